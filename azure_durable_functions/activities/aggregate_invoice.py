@@ -3,13 +3,25 @@ Activity: Aggregate all extracted page data into final invoice structure
 """
 
 import azure.durable_functions as df
+import itertools
+import os
 import time
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Dict
 
+import orjson
+
+import storage_helper
+
 aggregate_invoice_bp = df.Blueprint()
 
+logger = logging.getLogger(__name__)
+
+# Invoices with more line items than this are stored in blob storage and only
+# their URL is returned, keeping large payloads out of orchestration history
+MAX_INLINE_LINE_ITEMS = 500
+
 
 @aggregate_invoice_bp.activity_trigger(input_name="payload")
 def aggregate_invoice_data(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -22,21 +34,26 @@ def aggregate_invoice_data(payload: Dict[str, Any]) -> Dict[str, Any]:
     - Validate totals and calculations
     - Store in database
     - Generate final report
+
+    Large results (more than MAX_INLINE_LINE_ITEMS line items) are written to
+    the results container and {"invoice_id", "status", "result_url"} is
+    returned instead of the full invoice.
     """
     invoice_id = payload.get("invoice_id")
     pages = payload.get("pages", [])
     metadata = payload.get("metadata", {})
 
-    logging.info(f"[ACTIVITY:AGGREGATE] Aggregating data for {invoice_id}")
-    logging.info(f"[ACTIVITY:AGGREGATE] Processing {len(pages)} pages of data")
+    logger.info("[ACTIVITY:AGGREGATE] Aggregating data for %s", invoice_id)
+    logger.info("[ACTIVITY:AGGREGATE] Processing %s pages of data", len(pages))
 
-    # Simulate aggregation processing
-    time.sleep(1)
+    # Simulate aggregation processing (dev only)
+    if os.getenv("SIMULATE_SLOW"):
+        time.sleep(1)
 
-    # Organize data by section
-    header_data = {}
-    line_items = []
-    summary_data = {}
+    # Partition page data by section (single pass over pages)
+    header_pages = []
+    line_item_pages = []
+    summary_pages = []
 
     total_confidence = 0
     total_processing_time = 0
@@ -46,33 +63,55 @@ def aggregate_invoice_data(payload: Dict[str, Any]) -> Dict[str, Any]:
         data = page.get("data", {})
 
         if section == "header":
-            header_data.update(data)
+            header_pages.append(data)
         elif section == "line_items":
-            line_items.extend(data.get("items", []))
+            line_item_pages.append(data)
         elif section == "summary":
-            summary_data.update(data)
+            summary_pages.append(data)
 
+        total_confidence += page.get("confidence", 0)
         total_processing_time += page.get("processing_time_seconds", 0)
 
+    # Build each section in one go (later pages win on duplicate keys)
+    header_data = {k: v for data in header_pages for k, v in data.items()}
+    line_items = list(
+        itertools.chain.from_iterable(
+            data.get("items", []) for data in line_item_pages
+        )
+    )
+    summary_data = {k: v for data in summary_pages for k, v in data.items()}
+
+    n = len(pages)
+    avg = (total_confidence / n) if n else 0
+
     # Build final invoice structure
     final_invoice = {
         "invoice_id": invoice_id,
-        "processing_timestamp": datetime.utcnow().isoformat(),
+        "processing_timestamp": datetime.now(timezone.utc).isoformat(),
         "status": "completed",
         "header": header_data,
         "line_items": line_items,
         "summary": summary_data,
         "metadata": metadata,
         "processing_stats": {
-            "total_pages": len(pages),
-            "average_confidence": round(total_confidence / len(pages), 2)
-            if pages
-            else 0,
+            "total_pages": n,
+            "average_confidence": round(avg, 2),
             "total_processing_time_seconds": round(total_processing_time, 2),
         },
     }
 
-    logging.info(f"[ACTIVITY:AGGREGATE] Aggregation complete for {invoice_id}")
-    logging.info(f"[ACTIVITY:AGGREGATE] Total line items: {len(line_items)}")
+    logger.info("[ACTIVITY:AGGREGATE] Aggregation complete for %s", invoice_id)
+    logger.info("[ACTIVITY:AGGREGATE] Total line items: %s", len(line_items))
+
+    if len(line_items) > MAX_INLINE_LINE_ITEMS:
+        result_url = storage_helper.upload_result(
+            orjson.dumps(final_invoice), invoice_id
+        )
+        logger.info("[ACTIVITY:AGGREGATE] Result stored at: %s", result_url)
+        return {
+            "invoice_id": invoice_id,
+            "status": "completed",
+            "result_url": result_url,
+        }
 
     return final_invoice
@@ -1,25 +1,52 @@
 """
-Activity: Extract invoice data from a single page using LLM
+Activities: Extract invoice data from a single page or a batch of pages using LLM
 """
 
 import azure.durable_functions as df
+import os
 import time
 import logging
 import random
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import storage_helper
 
 extract_invoice_bp = df.Blueprint()
 
+logger = logging.getLogger(__name__)
+
 
 @extract_invoice_bp.activity_trigger(input_name="pagedata")
 def extract_invoice_data_from_page(pagedata: Dict[str, Any]) -> Dict[str, Any]:
     """
     Activity: Extract invoice data from a single page using LLM
+    """
+    return _extract_page(pagedata)
+
+
+@extract_invoice_bp.activity_trigger(input_name="payload")
+def extract_invoice_batch(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Activity: Extract invoice data from a batch of pages
+
+    Processing several pages per activity amortizes the per-activity message
+    and history overhead of the fan-out.
+
+    Input: {"pages": [page_data, ...]}
+    Returns: list of extracted page data, in the same order as the input
+    """
+    pages = payload.get("pages", [])
+    logger.info("[ACTIVITY:EXTRACT] Processing batch of %s pages", len(pages))
+    return [_extract_page(pagedata) for pagedata in pages]
+
+
+def _extract_page(pagedata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract invoice data from a single page
 
     Currently:
-    - Downloads real page image from Azurite blob storage
+    - Downloads real page image from Azurite blob storage (only when
+      LLM_ENABLED is set, since the mocked extraction doesn't use it)
     - Mocks LLM extraction (future: integrate GPT-4 Vision)
 
     In production, this would:
@@ -31,24 +58,32 @@ def extract_invoice_data_from_page(pagedata: Dict[str, Any]) -> Dict[str, Any]:
     invoice_id = pagedata.get("invoice_id")
     page_num = pagedata.get("page_number")
     image_url = pagedata.get("image_url")
+    image_mime_type = pagedata.get("image_mime_type", "image/jpeg")
 
-    logging.info(f"[ACTIVITY:EXTRACT] Processing page {page_num} of {invoice_id}")
-    logging.info(f"[ACTIVITY:EXTRACT] Image URL: {image_url}")
+    logger.debug("[ACTIVITY:EXTRACT] Processing page %s of %s", page_num, invoice_id)
+    logger.debug("[ACTIVITY:EXTRACT] Image URL: %s", image_url)
 
     # Download actual image from Azurite (proves image is available)
-    try:
-        image_data = storage_helper.download_blob(image_url)
-        logging.info(f"[ACTIVITY:EXTRACT] Downloaded image: {len(image_data)} bytes")
-        logging.info(
-            "[ACTIVITY:EXTRACT] Image ready for LLM (currently mocking extraction)"
-        )
-    except Exception as e:
-        logging.error(f"[ACTIVITY:EXTRACT] Failed to download image: {e}")
-        logging.warning("[ACTIVITY:EXTRACT] Proceeding with mock data")
-
-    # Simulate LLM API call time (2-5 seconds per page)
-    processing_time = random.uniform(2, 5)
-    time.sleep(processing_time)
+    if os.getenv("LLM_ENABLED"):
+        try:
+            image_data = storage_helper.download_blob(image_url)
+            logger.debug(
+                "[ACTIVITY:EXTRACT] Downloaded image: %s bytes",
+                len(image_data),
+            )
+            logger.debug(
+                "[ACTIVITY:EXTRACT] Image (%s) ready for LLM (currently mocking extraction)",
+                image_mime_type,
+            )
+        except Exception as e:
+            logger.error("[ACTIVITY:EXTRACT] Failed to download image: %s", e)
+            logger.warning("[ACTIVITY:EXTRACT] Proceeding with mock data")
+
+    # Simulate LLM API call time (2-5 seconds per page, dev only)
+    processing_time = 0
+    if os.getenv("EXTRACT_SIMULATE"):
+        processing_time = random.uniform(2, 5)
+        time.sleep(processing_time)
 
     # Mock: Generate realistic invoice data
     mock_line_items = [
@@ -111,9 +146,12 @@ def extract_invoice_data_from_page(pagedata: Dict[str, Any]) -> Dict[str, Any]:
             },
         }
 
+    extracted_data["confidence"] = round(random.uniform(0.85, 0.99), 2)
     extracted_data["processing_time_seconds"] = round(processing_time, 2)
 
-    logging.info(
-        f"[ACTIVITY:EXTRACT] Completed page {page_num} - Section: {extracted_data['section']}"
+    logger.debug(
+        "[ACTIVITY:EXTRACT] Completed page %s - Section: %s",
+        page_num,
+        extracted_data["section"],
     )
     return extracted_data
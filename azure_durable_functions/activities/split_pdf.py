@@ -4,12 +4,78 @@ Activity: Split PDF into individual page images
 
 import azure.durable_functions as df
 import logging
-from typing import Any, Dict, List
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
 
 import storage_helper
 
 split_pdf_bp = df.Blueprint()
 
+logger = logging.getLogger(__name__)
+
+# Render zoom factor: 2.0 means 144 DPI (default 72 DPI). Lower values cut the
+# pixel count (and memory per page) quadratically, e.g. 1.5 -> ~2.25x fewer.
+RENDER_ZOOM = float(os.getenv("PAGE_RENDER_ZOOM", "2.0"))
+
+# One render pool per worker process, shared by concurrent split activities so
+# they don't each spawn (and oversubscribe) a pool of their own. It uses the
+# "spawn" start method: forking the multithreaded Functions worker can deadlock.
+RENDER_WORKERS = os.cpu_count() or 1
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """Create the shared render pool on first use."""
+    global _render_pool
+    if _render_pool is None:
+        with _render_pool_lock:
+            if _render_pool is None:
+                _render_pool = ProcessPoolExecutor(
+                    max_workers=RENDER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _render_pool
+
+
+def _render_pages(
+    pdf_data: bytes, page_nums: List[int]
+) -> List[Tuple[int, bytes, int, int]]:
+    """
+    Render a range of PDF pages to JPEG bytes.
+
+    Runs in a worker process: fitz.Document is not picklable, so each worker
+    reopens the PDF from the raw bytes.
+
+    Returns:
+        List of (page_num, image_data, width, height)
+    """
+    import fitz  # PyMuPDF
+
+    rendered = []
+    pdf_document = fitz.open(stream=pdf_data, filetype="pdf")
+    try:
+        # Render page to image (at RENDER_ZOOM resolution)
+        mat = fitz.Matrix(RENDER_ZOOM, RENDER_ZOOM)
+        for page_num in page_nums:
+            page = pdf_document[page_num]
+            pix = page.get_pixmap(matrix=mat)
+
+            # Convert to JPEG bytes (much cheaper to encode than PNG, and the
+            # LLM extraction step accepts JPEG)
+            image_data = pix.tobytes("jpeg", jpg_quality=85)
+            rendered.append((page_num, image_data, pix.width, pix.height))
+
+            # Release the raw pixmap right away so only one is alive at a time
+            del image_data, pix, page
+    finally:
+        pdf_document.close()
+
+    return rendered
+
 
 @split_pdf_bp.activity_trigger(input_name="payload")
 def split_pdf_to_images(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -18,8 +84,10 @@ def split_pdf_to_images(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
 
     Uses PyMuPDF (fitz) to:
     1. Download PDF from Azurite blob URL
-    2. Convert each page to PNG image
-    3. Upload each image to Azurite blob storage
+    2. Convert each page to JPEG image (page ranges are rendered in parallel
+       worker processes, one per CPU core)
+    3. Upload each image to Azurite blob storage (in a thread pool, so uploads
+       overlap with rendering of the remaining pages)
     4. Return list of page metadata with blob URLs
     """
     import fitz  # PyMuPDF
@@ -28,57 +96,80 @@ def split_pdf_to_images(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     pdf_id = payload.get("pdf_id")
     pdf_blob_url = payload.get("pdf_blob_url")
 
-    logging.info(f"[ACTIVITY:SPLIT_PDF] Processing PDF: {invoice_id}")
-    logging.info(f"[ACTIVITY:SPLIT_PDF] Downloading PDF from: {pdf_blob_url}")
+    logger.info("[ACTIVITY:SPLIT_PDF] Processing PDF: %s", invoice_id)
+    logger.info("[ACTIVITY:SPLIT_PDF] Downloading PDF from: %s", pdf_blob_url)
 
     # Download PDF from Azurite
     pdf_data = storage_helper.download_blob(pdf_blob_url)
-    logging.info(f"[ACTIVITY:SPLIT_PDF] Downloaded PDF: {len(pdf_data)} bytes")
+    logger.info("[ACTIVITY:SPLIT_PDF] Downloaded PDF: %s bytes", len(pdf_data))
 
-    # Open PDF with PyMuPDF
-    pdf_document = fitz.open(stream=pdf_data, filetype="pdf")
-    page_count = len(pdf_document)
-    logging.info(f"[ACTIVITY:SPLIT_PDF] PDF has {page_count} pages")
+    # Open PDF with PyMuPDF to get the page count
+    with fitz.open(stream=pdf_data, filetype="pdf") as pdf_document:
+        page_count = len(pdf_document)
+    logger.info("[ACTIVITY:SPLIT_PDF] PDF has %s pages", page_count)
+
+    # Split pages into one contiguous range per render worker
+    render_workers = max(1, min(RENDER_WORKERS, page_count))
+    chunk_size = -(-page_count // render_workers) if page_count else 1
+    page_ranges = [
+        list(range(start, min(start + chunk_size, page_count)))
+        for start in range(0, page_count, chunk_size)
+    ]
 
     # Convert each page to image and upload
-    pages = []
-    for page_num in range(page_count):
-        logging.info(
-            f"[ACTIVITY:SPLIT_PDF] Converting page {page_num + 1}/{page_count} to image..."
-        )
-
-        # Get page
-        page = pdf_document[page_num]
-
-        # Render page to image (at 2x resolution for better quality)
-        # zoom=2.0 means 2x scaling (144 DPI instead of default 72 DPI)
-        mat = fitz.Matrix(2.0, 2.0)
-        pix = page.get_pixmap(matrix=mat)
-
-        # Convert to PNG bytes
-        image_data = pix.tobytes("png")
-        logging.info(
-            f"[ACTIVITY:SPLIT_PDF] Page {page_num + 1} image: {len(image_data)} bytes, {pix.width}x{pix.height}px"
-        )
-
-        # Upload image to Azurite
-        image_blob_url = storage_helper.upload_page_image(image_data, pdf_id, page_num)
-        logging.info(
-            f"[ACTIVITY:SPLIT_PDF] Page {page_num + 1} uploaded: {image_blob_url}"
-        )
-
-        # Create page metadata
-        page_data = {
-            "invoice_id": invoice_id,
-            "page_number": page_num,
-            "total_pages": page_count,
-            "image_url": image_blob_url,
-            "image_size": f"{pix.width}x{pix.height}",
-        }
-        pages.append(page_data)
-
-    # Close PDF document
-    pdf_document.close()
-
-    logging.info(f"[ACTIVITY:SPLIT_PDF] Successfully processed {page_count} pages")
+    upload_futures = {}
+    image_sizes = {}
+    with ThreadPoolExecutor(max_workers=8) as upload_pool:
+
+        def submit_uploads(rendered: List[Tuple[int, bytes, int, int]]) -> None:
+            for page_num, image_data, width, height in rendered:
+                logger.debug(
+                    "[ACTIVITY:SPLIT_PDF] Page %s image: %s bytes, %sx%spx",
+                    page_num + 1,
+                    len(image_data),
+                    width,
+                    height,
+                )
+                # Upload image to Azurite in the background
+                upload_futures[page_num] = upload_pool.submit(
+                    storage_helper.upload_page_image, image_data, pdf_id, page_num
+                )
+                image_sizes[page_num] = f"{width}x{height}"
+
+        if len(page_ranges) > 1:
+            render_pool = _get_render_pool()
+            render_futures = [
+                render_pool.submit(_render_pages, pdf_data, page_range)
+                for page_range in page_ranges
+            ]
+            for future in as_completed(render_futures):
+                submit_uploads(future.result())
+                # Drop the finished future so its rendered pages can be
+                # freed as soon as they are uploaded
+                render_futures.remove(future)
+        else:
+            for page_range in page_ranges:
+                submit_uploads(_render_pages(pdf_data, page_range))
+
+        # Collect uploaded blob URLs and create page metadata
+        pages = []
+        for page_num in range(page_count):
+            image_blob_url = upload_futures[page_num].result()
+            logger.debug(
+                "[ACTIVITY:SPLIT_PDF] Page %s uploaded: %s",
+                page_num + 1,
+                image_blob_url,
+            )
+
+            page_data = {
+                "invoice_id": invoice_id,
+                "page_number": page_num,
+                "total_pages": page_count,
+                "image_url": image_blob_url,
+                "image_size": image_sizes[page_num],
+                "image_mime_type": storage_helper.PAGE_IMAGE_CONTENT_TYPE,
+            }
+            pages.append(page_data)
+
+    logger.info("[ACTIVITY:SPLIT_PDF] Successfully processed %s pages", page_count)
     return pages
@@ -4,13 +4,21 @@ Activity: Upload PDF to Azurite blob storage
 
 import azure.durable_functions as df
 import logging
-import base64
+import binascii
+import os
 from typing import Any, Dict
 
+import requests
+
 import storage_helper
 
 upload_pdf_bp = df.Blueprint()
 
+logger = logging.getLogger(__name__)
+
+# Shared HTTP session so repeated downloads reuse pooled connections
+_SESSION = requests.Session()
+
 
 @upload_pdf_bp.activity_trigger(input_name="payload")
 def upload_pdf_to_storage_activity(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -22,6 +30,9 @@ def upload_pdf_to_storage_activity(payload: Dict[str, Any]) -> Dict[str, Any]:
     2. PDF URL - Downloads from URL
     3. PDF Base64 - Decodes base64 string
 
+    If pdf_url already points at our pdfs container (e.g. uploaded by the client
+    through a SAS URL), the blob is used in place and not re-uploaded.
+
     Returns:
         Dict with pdf_blob_url and pdf_id
     """
@@ -30,43 +41,59 @@ def upload_pdf_to_storage_activity(payload: Dict[str, Any]) -> Dict[str, Any]:
     pdf_base64 = payload.get("pdf_base64")
     pdf_path = payload.get("pdf_path")
 
-    logging.info(f"[ACTIVITY:UPLOAD_PDF] Uploading PDF for invoice: {invoice_id}")
+    logger.info("[ACTIVITY:UPLOAD_PDF] Uploading PDF for invoice: %s", invoice_id)
 
-    # Ensure containers exist
+    # Ensure containers exist (cached per process, so only the first call
+    # per worker hits storage)
     storage_helper.ensure_container_exists("pdfs")
     storage_helper.ensure_container_exists("images")
 
-    # Get PDF data based on source
-    pdf_data = None
-    if pdf_path:
-        logging.info(f"[ACTIVITY:UPLOAD_PDF] Reading from file: {pdf_path}")
+    # Use invoice_id as pdf_id (clean it for blob storage)
+    pdf_id = storage_helper.sanitize_blob_name(invoice_id)
+
+    # Stream PDF to Azurite based on source
+    if pdf_url and storage_helper.is_pdf_blob_url(pdf_url):
+        logger.info("[ACTIVITY:UPLOAD_PDF] PDF already in storage: %s", pdf_url)
+        blob_url = pdf_url.split("?", 1)[0]
+        pdf_size = storage_helper.get_blob_size(blob_url)
+    elif pdf_path:
+        logger.info("[ACTIVITY:UPLOAD_PDF] Reading from file: %s", pdf_path)
+        pdf_size = os.path.getsize(pdf_path)
         with open(pdf_path, "rb") as f:
-            pdf_data = f.read()
+            blob_url = storage_helper.upload_pdf_to_storage(f, pdf_id, pdf_size)
     elif pdf_url:
-        logging.info(f"[ACTIVITY:UPLOAD_PDF] Downloading from URL: {pdf_url}")
-        import urllib.request
-
-        with urllib.request.urlopen(pdf_url) as response:
-            pdf_data = response.read()
+        logger.info("[ACTIVITY:UPLOAD_PDF] Downloading from URL: %s", pdf_url)
+        with _SESSION.get(pdf_url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            content_length = response.headers.get("Content-Length")
+            if content_length and "Content-Encoding" not in response.headers:
+                pdf_size = int(content_length)
+                blob_url = storage_helper.upload_pdf_to_storage(
+                    response.raw, pdf_id, pdf_size
+                )
+            else:
+                # Unknown size: fall back to buffering the response
+                pdf_data = response.content
+                pdf_size = len(pdf_data)
+                blob_url = storage_helper.upload_pdf_to_storage(pdf_data, pdf_id)
     elif pdf_base64:
-        logging.info(
-            f"[ACTIVITY:UPLOAD_PDF] Decoding base64 PDF ({len(pdf_base64)} chars)"
+        logger.info(
+            "[ACTIVITY:UPLOAD_PDF] Decoding base64 PDF (%s chars)",
+            len(pdf_base64),
         )
-        pdf_data = base64.b64decode(pdf_base64)
+        if isinstance(pdf_base64, str):
+            pdf_base64 = pdf_base64.encode("ascii")
+        pdf_data = binascii.a2b_base64(pdf_base64)
+        pdf_size = len(pdf_data)
+        blob_url = storage_helper.upload_pdf_to_storage(pdf_data, pdf_id)
     else:
         raise ValueError("No PDF source provided")
 
-    # Use invoice_id as pdf_id (clean it for blob storage)
-    pdf_id = invoice_id.replace("/", "_").replace("\\", "_")
-
-    # Upload PDF to Azurite
-    blob_url = storage_helper.upload_pdf_to_storage(pdf_data, pdf_id)
-
-    logging.info(f"[ACTIVITY:UPLOAD_PDF] PDF uploaded successfully: {blob_url}")
-    logging.info(f"[ACTIVITY:UPLOAD_PDF] PDF size: {len(pdf_data)} bytes")
+    logger.info("[ACTIVITY:UPLOAD_PDF] PDF uploaded successfully: %s", blob_url)
+    logger.info("[ACTIVITY:UPLOAD_PDF] PDF size: %s bytes", pdf_size)
 
     return {
         "pdf_blob_url": blob_url,
         "pdf_id": pdf_id,
-        "pdf_size_bytes": len(pdf_data),
+        "pdf_size_bytes": pdf_size,
     }
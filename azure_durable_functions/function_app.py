@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import azure.functions as func
 import azure.durable_functions as df
 import logging
-import json
+import os
+
+import orjson
 
 import storage_helper
 
@@ -16,6 +19,20 @@ myApp = df.DFApp(http_auth_level=func.AuthLevel.ANONYMOUS)
 for bp in activity_blueprints:
     myApp.register_functions(bp)
 
+# Pages handled by each page_chunk_orchestrator sub-orchestration
+PAGE_CHUNK_SIZE = 20
+
+# Pages handled by each extract_invoice_batch activity (read once at import so
+# orchestrator replays stay deterministic); at least 1, since range() rejects 0
+EXTRACT_BATCH_SIZE = max(1, int(os.getenv("EXTRACT_BATCH_SIZE", "5")))
+
+# Largest pdf_base64 payload accepted inline; bigger PDFs must be uploaded to
+# blob storage first (see /api/invoice/upload-url) so they stay out of history
+MAX_INLINE_PDF_BASE64_CHARS = 256 * 1024
+
+# Most instance IDs accepted by one /api/invoice/status/batch request
+MAX_STATUS_BATCH_IDS = 100
+
 # ============================================================================
 # region HTTP TRIGGERS
 # ============================================================================
@@ -41,11 +58,13 @@ async def process_invoice(req: func.HttpRequest, client):
 
     Supports three modes:
     1. PDF URL (pdf_url) - URL to download PDF from
-    2. PDF Base64 (pdf_base64) - Base64-encoded PDF content
+    2. PDF Base64 (pdf_base64) - Base64-encoded PDF content (small PDFs only,
+       larger ones are rejected with 413; upload them via /api/invoice/upload-url
+       and pass the blob URL as pdf_url)
     3. PDF Path (pdf_path) - Local file system path
     """
     try:
-        req_body = req.get_json()
+        req_body = orjson.loads(req.get_body())
         invoice_id = req_body.get("invoice_id")
         pdf_url = req_body.get("pdf_url")
         pdf_base64 = req_body.get("pdf_base64")
@@ -54,14 +73,14 @@ async def process_invoice(req: func.HttpRequest, client):
 
         if not invoice_id:
             return func.HttpResponse(
-                json.dumps({"error": "Missing invoice_id"}),
+                orjson.dumps({"error": "Missing invoice_id"}),
                 status_code=400,
                 mimetype="application/json",
             )
 
         if not (pdf_url or pdf_base64 or pdf_path):
             return func.HttpResponse(
-                json.dumps(
+                orjson.dumps(
                     {
                         "error": "Missing PDF source: provide pdf_url, pdf_base64, or pdf_path"
                     }
@@ -70,6 +89,20 @@ async def process_invoice(req: func.HttpRequest, client):
                 mimetype="application/json",
             )
 
+        if pdf_base64 and len(pdf_base64) > MAX_INLINE_PDF_BASE64_CHARS:
+            return func.HttpResponse(
+                orjson.dumps(
+                    {
+                        "error": "pdf_base64 payload too large",
+                        "max_chars": MAX_INLINE_PDF_BASE64_CHARS,
+                        "hint": "Request an upload URL from /api/invoice/upload-url, "
+                        "PUT the PDF to it, then pass the blob URL as pdf_url",
+                    }
+                ),
+                status_code=413,
+                mimetype="application/json",
+            )
+
         # Start the invoice processing orchestration
         input_data = {
             "invoice_id": invoice_id,
@@ -88,11 +121,119 @@ async def process_invoice(req: func.HttpRequest, client):
 
     except ValueError:
         return func.HttpResponse(
-            json.dumps({"error": "Invalid JSON body"}),
+            orjson.dumps({"error": "Invalid JSON body"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+
+@myApp.route(route="invoice/upload-url", methods=["GET"])
+def get_upload_url(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Get a short-lived SAS URL for uploading a PDF directly to blob storage
+
+    GET /api/invoice/upload-url?invoice_id=INV-2025-001
+
+    The client PUTs the PDF to upload_url (with header x-ms-blob-type: BlockBlob)
+    and then starts processing with {"invoice_id": ..., "pdf_url": pdf_url}.
+    """
+    invoice_id = req.params.get("invoice_id")
+    if not invoice_id:
+        return func.HttpResponse(
+            orjson.dumps({"error": "Missing invoice_id"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    pdf_id = storage_helper.sanitize_blob_name(invoice_id)
+    upload_url = storage_helper.get_upload_sas_url(pdf_id)
+
+    return func.HttpResponse(
+        orjson.dumps(
+            {
+                "upload_url": upload_url,
+                "pdf_url": upload_url.split("?", 1)[0],
+                "expires_in_minutes": storage_helper.UPLOAD_SAS_EXPIRY_MINUTES,
+            }
+        ),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@myApp.route(route="invoice/status/batch", methods=["POST"])
+@myApp.durable_client_input(client_name="client")
+async def get_invoice_status_batch(req: func.HttpRequest, client):
+    """
+    Get the status of several orchestration instances in one request
+
+    POST /api/invoice/status/batch
+    Body: {"ids": ["<instance_id>", ...]}
+
+    Returns a list of {"id", "runtimeStatus", "output"} in request order, so
+    pollers tracking many instances make one request per cycle instead of one
+    per instance. runtimeStatus is null for instances not found (yet) or
+    whose status lookup failed.
+    """
+    try:
+        body = orjson.loads(req.get_body())
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        return func.HttpResponse(
+            orjson.dumps({"error": "Invalid JSON body"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    instance_ids = body.get("ids")
+    if (
+        not isinstance(instance_ids, list)
+        or not instance_ids
+        or not all(isinstance(i, str) and i for i in instance_ids)
+    ):
+        return func.HttpResponse(
+            orjson.dumps({"error": "Missing ids"}),
             status_code=400,
             mimetype="application/json",
         )
 
+    if len(instance_ids) > MAX_STATUS_BATCH_IDS:
+        return func.HttpResponse(
+            orjson.dumps({"error": "Too many ids", "max_ids": MAX_STATUS_BATCH_IDS}),
+            status_code=413,
+            mimetype="application/json",
+        )
+
+    # The durable client raises on unexpected status codes; one bad id must
+    # not fail the whole batch
+    statuses = await asyncio.gather(
+        *(client.get_status(instance_id) for instance_id in instance_ids),
+        return_exceptions=True,
+    )
+
+    results = []
+    for instance_id, status in zip(instance_ids, statuses):
+        if isinstance(status, Exception):
+            logging.warning(f"Status lookup failed for {instance_id}: {status}")
+            results.append({"id": instance_id, "runtimeStatus": None, "output": None})
+        else:
+            results.append(
+                {
+                    "id": instance_id,
+                    "runtimeStatus": (
+                        status.runtime_status.name if status.runtime_status else None
+                    ),
+                    "output": status.output,
+                }
+            )
+
+    return func.HttpResponse(
+        orjson.dumps(results),
+        status_code=200,
+        mimetype="application/json",
+    )
+
 
 # ============================================================================
 # endregion HTTP TRIGGERS
@@ -161,16 +302,22 @@ def invoice_orchestrator(context: df.DurableOrchestrationContext):
     logging.info(f"[ORCHESTRATOR] PDF split into {page_count} page images")
 
     # Step 3: Process each page in parallel (FAN-OUT)
+    # Pages are grouped into chunks, each handled by a sub-orchestration, so the
+    # parent history grows with the number of chunks instead of pages.
     logging.info(f"[ORCHESTRATOR] Step 3: Processing {page_count} pages in parallel...")
 
-    # Create parallel tasks for each page
-    parallel_tasks = []
-    for page_data in pages_data:
-        task = context.call_activity("extract_invoice_data_from_page", page_data)
-        parallel_tasks.append(task)
+    chunks = [
+        pages_data[i : i + PAGE_CHUNK_SIZE]
+        for i in range(0, page_count, PAGE_CHUNK_SIZE)
+    ]
+    chunk_tasks = [
+        context.call_sub_orchestrator("page_chunk_orchestrator", chunk)
+        for chunk in chunks
+    ]
 
-    # Wait for all pages to complete (FAN-IN)
-    extracted_data_list = yield context.task_all(parallel_tasks)
+    # Wait for all chunks to complete (FAN-IN) and flatten the results
+    chunk_results = yield context.task_all(chunk_tasks)
+    extracted_data_list = [page for chunk in chunk_results for page in chunk]
 
     logging.info(f"[ORCHESTRATOR] All {page_count} pages processed")
 
@@ -191,6 +338,30 @@ def invoice_orchestrator(context: df.DurableOrchestrationContext):
     return final_result
 
 
+@myApp.orchestration_trigger(context_name="context")
+def page_chunk_orchestrator(context: df.DurableOrchestrationContext):
+    """
+    Sub-orchestrator that extracts a chunk of pages in parallel
+
+    Pages are sent to extract_invoice_batch in batches of EXTRACT_BATCH_SIZE.
+
+    Input: list of page metadata dicts (as returned by split_pdf_to_images)
+    Returns: list of extracted page data, in the same order as the input
+    """
+    pages_data = context.get_input() or []
+
+    tasks = [
+        context.call_activity(
+            "extract_invoice_batch",
+            {"pages": pages_data[i : i + EXTRACT_BATCH_SIZE]},
+        )
+        for i in range(0, len(pages_data), EXTRACT_BATCH_SIZE)
+    ]
+    batch_results = yield context.task_all(tasks)
+
+    return [page for batch in batch_results for page in batch]
+
+
 # ============================================================================
 # endregion ORCHESTRATORS
 # ============================================================================
@@ -214,14 +385,15 @@ def startup_init(req: func.HttpRequest) -> func.HttpResponse:
         logging.info("[STARTUP] Initializing Azurite storage...")
         storage_helper.ensure_container_exists("pdfs")
         storage_helper.ensure_container_exists("images")
+        storage_helper.ensure_container_exists("results")
         logging.info("[STARTUP] Storage initialization complete")
 
         return func.HttpResponse(
-            json.dumps(
+            orjson.dumps(
                 {
                     "status": "success",
                     "message": "Azurite storage initialized successfully",
-                    "containers": ["pdfs", "images"],
+                    "containers": ["pdfs", "images", "results"],
                 }
             ),
             status_code=200,
@@ -230,7 +402,7 @@ def startup_init(req: func.HttpRequest) -> func.HttpResponse:
     except Exception as e:
         logging.error(f"[STARTUP] Error initializing storage: {str(e)}")
         return func.HttpResponse(
-            json.dumps(
+            orjson.dumps(
                 {
                     "status": "error",
                     "message": f"Failed to initialize storage: {str(e)}",
@@ -5,7 +5,17 @@ Provides utility functions for uploading PDFs, page images, and retrieving blob
 
 import os
 import logging
-from azure.storage.blob import BlobServiceClient
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import BinaryIO, Optional, Union
+from urllib.parse import urlparse
+from azure.storage.blob import (
+    BlobSasPermissions,
+    BlobServiceClient,
+    ContainerClient,
+    ContentSettings,
+    generate_blob_sas,
+)
 from azure.core.exceptions import ResourceExistsError
 
 # Configure logging
@@ -24,81 +34,151 @@ AZURITE_CONNECTION_STRING = (
 # Container names
 PDF_CONTAINER = "pdfs"
 IMAGE_CONTAINER = "images"
+RESULT_CONTAINER = "results"
+
+# Characters that are unsafe in blob names, mapped to "_"
+_BLOB_NAME_TRANS = str.maketrans({"/": "_", "\\": "_", ":": "_", "?": "_"})
+
+# Lifetime of SAS URLs handed out for direct client uploads
+UPLOAD_SAS_EXPIRY_MINUTES = 15
+
+# Page image format
+PAGE_IMAGE_EXTENSION = "jpg"
+PAGE_IMAGE_CONTENT_TYPE = "image/jpeg"
+
+# Container clients reused across calls within this worker process
+_container_clients: dict[str, ContainerClient] = {}
+
+# Containers already verified/created by this worker process
+_VERIFIED_CONTAINERS: set[str] = set()
+
+
+@lru_cache(maxsize=1)
+def _create_blob_service_client(connection_string: str) -> BlobServiceClient:
+    logger.info("[STORAGE] Connecting to blob storage...")
+    return BlobServiceClient.from_connection_string(connection_string)
+
+
+def sanitize_blob_name(name: str) -> str:
+    """
+    Clean an identifier (e.g. invoice_id) for use as a blob name.
+    
+    Args:
+        name: Raw identifier
+        
+    Returns:
+        str: Identifier with path separators, ":" and "?" replaced by underscores
+    """
+    return name.translate(_BLOB_NAME_TRANS)
 
 
 def get_blob_service_client() -> BlobServiceClient:
     """
     Get a BlobServiceClient connected to Azurite local storage emulator.
+
+    The client (and its HTTP connection pool) is created once per connection
+    string and reused for all subsequent storage operations.
     
     Returns:
         BlobServiceClient: Client for interacting with blob storage
     """
     # First check environment variable, then fall back to default
     connection_string = os.environ.get("AZURE_STORAGE_CONNECTION_STRING", AZURITE_CONNECTION_STRING)
-    logger.info("[STORAGE] Connecting to blob storage...")
-    return BlobServiceClient.from_connection_string(connection_string)
+    return _create_blob_service_client(connection_string)
+
+
+def get_container_client(container_name: str) -> ContainerClient:
+    """
+    Get a cached ContainerClient for the given container.
+    
+    Args:
+        container_name: Name of the container
+        
+    Returns:
+        ContainerClient: Client for interacting with the container
+    """
+    container_client = _container_clients.get(container_name)
+    if container_client is None:
+        container_client = get_blob_service_client().get_container_client(container_name)
+        _container_clients[container_name] = container_client
+    return container_client
 
 
 def ensure_container_exists(container_name: str = PDF_CONTAINER) -> None:
     """
     Ensure the specified container exists in blob storage.
-    Creates it if it doesn't exist.
+    Creates it if it doesn't exist. The result is remembered for the lifetime
+    of the process, so repeated calls don't hit storage.
     
     Args:
         container_name: Name of the container to ensure exists
     """
+    if container_name in _VERIFIED_CONTAINERS:
+        return
+    
     try:
-        blob_service_client = get_blob_service_client()
-        container_client = blob_service_client.get_container_client(container_name)
+        container_client = get_container_client(container_name)
         
         # Try to get container properties (will fail if doesn't exist)
         try:
             container_client.get_container_properties()
-            logger.info(f"[STORAGE] Container '{container_name}' already exists")
+            logger.info("[STORAGE] Container '%s' already exists", container_name)
         except Exception:
             # Container doesn't exist, create it
             container_client.create_container()
-            logger.info(f"[STORAGE] Created container '{container_name}'")
+            logger.info("[STORAGE] Created container '%s'", container_name)
+        
+        _VERIFIED_CONTAINERS.add(container_name)
             
     except ResourceExistsError:
-        logger.info(f"[STORAGE] Container '{container_name}' already exists (race condition)")
+        logger.info(
+            "[STORAGE] Container '%s' already exists (race condition)",
+            container_name,
+        )
+        _VERIFIED_CONTAINERS.add(container_name)
     except Exception as e:
-        logger.error(f"[STORAGE] Error ensuring container exists: {str(e)}")
+        logger.error("[STORAGE] Error ensuring container exists: %s", e)
         raise
 
 
-def upload_pdf_to_storage(pdf_data: bytes, pdf_id: str) -> str:
+def upload_pdf_to_storage(
+    pdf_data: Union[bytes, BinaryIO], pdf_id: str, length: Optional[int] = None
+) -> str:
     """
     Upload a PDF file to blob storage.
     
+    Streams are uploaded in parallel blocks, so the PDF never has to be held
+    in memory in full.
+    
     Args:
-        pdf_data: Raw PDF file bytes
+        pdf_data: Raw PDF file bytes or a readable binary stream
         pdf_id: Unique identifier for the PDF (typically filename without extension)
+        length: Size of the PDF in bytes, if known (required for efficient
+            streaming of non-seekable sources)
         
     Returns:
         str: Blob URL where the PDF was uploaded
     """
     try:
-        blob_service_client = get_blob_service_client()
-        
         # Construct blob path: pdfs/{pdf_id}.pdf
         blob_name = f"{pdf_id}.pdf"
-        blob_client = blob_service_client.get_blob_client(
-            container=PDF_CONTAINER,
-            blob=blob_name
-        )
+        blob_client = get_container_client(PDF_CONTAINER).get_blob_client(blob_name)
         
         # Upload PDF
-        logger.info(f"[STORAGE] Uploading PDF to {blob_name} ({len(pdf_data)} bytes)")
-        blob_client.upload_blob(pdf_data, overwrite=True)
+        if length is None and isinstance(pdf_data, bytes):
+            length = len(pdf_data)
+        logger.info("[STORAGE] Uploading PDF to %s (%s bytes)", blob_name, length)
+        blob_client.upload_blob(
+            pdf_data, overwrite=True, length=length, max_concurrency=4
+        )
         
         # Return the blob URL
         blob_url = get_azurite_url(blob_name)
-        logger.info(f"[STORAGE] PDF uploaded successfully: {blob_url}")
+        logger.info("[STORAGE] PDF uploaded successfully: %s", blob_url)
         return blob_url
         
     except Exception as e:
-        logger.error(f"[STORAGE] Error uploading PDF: {str(e)}")
+        logger.error("[STORAGE] Error uploading PDF: %s", e)
         raise
 
 
@@ -107,7 +187,7 @@ def upload_page_image(image_data: bytes, pdf_id: str, page_num: int) -> str:
     Upload a page image to blob storage.
     
     Args:
-        image_data: Raw PNG image bytes
+        image_data: Raw JPEG image bytes
         pdf_id: PDF identifier (parent document)
         page_num: Page number (0-indexed)
         
@@ -115,26 +195,135 @@ def upload_page_image(image_data: bytes, pdf_id: str, page_num: int) -> str:
         str: Blob URL where the image was uploaded
     """
     try:
-        blob_service_client = get_blob_service_client()
-        
-        # Construct blob path: images/{pdf_id}/page_{num}.png
-        blob_name = f"{pdf_id}/page_{page_num}.png"
-        blob_client = blob_service_client.get_blob_client(
-            container=IMAGE_CONTAINER,
-            blob=blob_name
-        )
+        # Construct blob path: images/{pdf_id}/page_{num}.jpg
+        blob_name = f"{pdf_id}/page_{page_num}.{PAGE_IMAGE_EXTENSION}"
+        blob_client = get_container_client(IMAGE_CONTAINER).get_blob_client(blob_name)
         
         # Upload image
-        logger.info(f"[STORAGE] Uploading page image to {blob_name} ({len(image_data)} bytes)")
-        blob_client.upload_blob(image_data, overwrite=True)
+        logger.debug(
+            "[STORAGE] Uploading page image to %s (%s bytes)",
+            blob_name,
+            len(image_data),
+        )
+        blob_client.upload_blob(
+            image_data,
+            overwrite=True,
+            content_settings=ContentSettings(content_type=PAGE_IMAGE_CONTENT_TYPE),
+        )
         
         # Return the blob URL
         blob_url = get_azurite_url(blob_name, container_name=IMAGE_CONTAINER)
-        logger.info(f"[STORAGE] Page image uploaded successfully: {blob_url}")
+        logger.debug("[STORAGE] Page image uploaded successfully: %s", blob_url)
         return blob_url
         
     except Exception as e:
-        logger.error(f"[STORAGE] Error uploading page image: {str(e)}")
+        logger.error("[STORAGE] Error uploading page image: %s", e)
+        raise
+
+
+def parse_blob_url(blob_url: str) -> tuple[str, str]:
+    """
+    Extract container and blob name from a blob URL.
+    
+    Args:
+        blob_url: Full blob URL (Azurite URL format, query string is ignored)
+        
+    Returns:
+        tuple[str, str]: (container_name, blob_name)
+    """
+    # Format: http://127.0.0.1:10000/devstoreaccount1/{container}/{blob_name}
+    path = urlparse(blob_url).path.lstrip("/")
+    parts = path.split("/", 2)
+    
+    if len(parts) != 3 or not all(parts):
+        raise ValueError(f"Invalid blob URL format: {blob_url}")
+    
+    _, container_name, blob_name = parts
+    return container_name, blob_name
+
+
+def is_pdf_blob_url(url: str) -> bool:
+    """
+    Check whether a URL points at a blob in our PDF container.
+    
+    Args:
+        url: URL to check
+        
+    Returns:
+        bool: True if the URL is an Azurite URL inside the pdfs container
+    """
+    return url.split("?", 1)[0].startswith(get_azurite_url("", PDF_CONTAINER))
+
+
+def get_blob_size(blob_url: str) -> int:
+    """
+    Get the size of a blob without downloading it.
+    
+    Args:
+        blob_url: Full blob URL (Azurite URL format)
+        
+    Returns:
+        int: Blob size in bytes
+    """
+    container_name, blob_name = parse_blob_url(blob_url)
+    blob_client = get_container_client(container_name).get_blob_client(blob_name)
+    return blob_client.get_blob_properties().size
+
+
+def get_upload_sas_url(pdf_id: str) -> str:
+    """
+    Create a short-lived SAS URL that lets a client upload a PDF directly
+    into the pdfs container.
+    
+    Args:
+        pdf_id: PDF identifier; the blob is stored as {pdf_id}.pdf
+        
+    Returns:
+        str: Blob URL with a write-only SAS token appended
+    """
+    blob_service_client = get_blob_service_client()
+    blob_name = f"{pdf_id}.pdf"
+    sas_token = generate_blob_sas(
+        account_name=blob_service_client.account_name,
+        container_name=PDF_CONTAINER,
+        blob_name=blob_name,
+        account_key=blob_service_client.credential.account_key,
+        permission=BlobSasPermissions(create=True, write=True),
+        expiry=datetime.now(timezone.utc) + timedelta(minutes=UPLOAD_SAS_EXPIRY_MINUTES),
+    )
+    return f"{get_azurite_url(blob_name)}?{sas_token}"
+
+
+def upload_result(result_data: bytes, result_id: str) -> str:
+    """
+    Upload a serialized (JSON) invoice result to blob storage.
+    
+    Args:
+        result_data: JSON-encoded result bytes
+        result_id: Result identifier (typically the invoice_id)
+        
+    Returns:
+        str: Blob URL where the result was uploaded
+    """
+    try:
+        # Construct blob path: results/{result_id}.json
+        blob_name = f"{sanitize_blob_name(result_id)}.json"
+        ensure_container_exists(RESULT_CONTAINER)
+        blob_client = get_container_client(RESULT_CONTAINER).get_blob_client(blob_name)
+        
+        logger.info("[STORAGE] Uploading result to %s (%s bytes)", blob_name, len(result_data))
+        blob_client.upload_blob(
+            result_data,
+            overwrite=True,
+            content_settings=ContentSettings(content_type="application/json"),
+        )
+        
+        blob_url = get_azurite_url(blob_name, container_name=RESULT_CONTAINER)
+        logger.info("[STORAGE] Result uploaded successfully: %s", blob_url)
+        return blob_url
+        
+    except Exception as e:
+        logger.error("[STORAGE] Error uploading result: %s", e)
         raise
 
 
@@ -149,37 +338,18 @@ def download_blob(blob_url: str) -> bytes:
         bytes: Raw blob data
     """
     try:
-        # Extract container and blob name from URL
-        # Format: http://127.0.0.1:10000/devstoreaccount1/{container}/{blob_name}
-        # Try pdfs container first
-        if f"/{PDF_CONTAINER}/" in blob_url:
-            parts = blob_url.split(f"/{PDF_CONTAINER}/")
-            container_name = PDF_CONTAINER
-        elif f"/{IMAGE_CONTAINER}/" in blob_url:
-            parts = blob_url.split(f"/{IMAGE_CONTAINER}/")
-            container_name = IMAGE_CONTAINER
-        else:
-            raise ValueError(f"Invalid blob URL format (no recognized container): {blob_url}")
-        
-        if len(parts) != 2:
-            raise ValueError(f"Invalid blob URL format: {blob_url}")
-        
-        blob_name = parts[1]
-        
-        blob_service_client = get_blob_service_client()
-        blob_client = blob_service_client.get_blob_client(
-            container=container_name,
-            blob=blob_name
-        )
+        container_name, blob_name = parse_blob_url(blob_url)
+        
+        blob_client = get_container_client(container_name).get_blob_client(blob_name)
         
-        logger.info(f"[STORAGE] Downloading blob: {container_name}/{blob_name}")
+        logger.debug("[STORAGE] Downloading blob: %s/%s", container_name, blob_name)
         blob_data = blob_client.download_blob().readall()
-        logger.info(f"[STORAGE] Downloaded {len(blob_data)} bytes from {blob_name}")
+        logger.debug("[STORAGE] Downloaded %s bytes from %s", len(blob_data), blob_name)
         
         return blob_data
         
     except Exception as e:
-        logger.error(f"[STORAGE] Error downloading blob: {str(e)}")
+        logger.error("[STORAGE] Error downloading blob: %s", e)
         raise
 
 
@@ -210,10 +380,9 @@ def list_blobs_in_folder(folder_prefix: str) -> list[str]:
         list[str]: List of blob URLs matching the prefix
     """
     try:
-        blob_service_client = get_blob_service_client()
-        container_client = blob_service_client.get_container_client(PDF_CONTAINER)
+        container_client = get_container_client(PDF_CONTAINER)
         
-        logger.info(f"[STORAGE] Listing blobs with prefix: {folder_prefix}")
+        logger.info("[STORAGE] Listing blobs with prefix: %s", folder_prefix)
         
         blob_urls = []
         blob_list = container_client.list_blobs(name_starts_with=folder_prefix)
@@ -222,9 +391,9 @@ def list_blobs_in_folder(folder_prefix: str) -> list[str]:
             blob_url = get_azurite_url(blob.name)
             blob_urls.append(blob_url)
         
-        logger.info(f"[STORAGE] Found {len(blob_urls)} blobs")
+        logger.info("[STORAGE] Found %s blobs", len(blob_urls))
         return blob_urls
         
     except Exception as e:
-        logger.error(f"[STORAGE] Error listing blobs: {str(e)}")
+        logger.error("[STORAGE] Error listing blobs: %s", e)
         raise
@@ -12,23 +12,44 @@ Options:
     --base-url      Base URL of the function app (default: http://localhost:8071)
     --pdf-path      Path to a test PDF file (default: uses sample in data folder)
     --total         Total number of workflows to submit (default: 10)
-    --batch-size    Number of workflows to submit in each batch (default: 3)
-    --delay         Delay between batches in seconds (default: 2)
+    --batch-size    Maximum number of submissions in flight at once (default: 3)
+    --delay         Pause after each submission before its in-flight slot is
+                    released, in seconds (default: 0)
     --poll-interval Interval to poll for status in seconds (default: 5)
-    --timeout       Maximum time to wait for all workflows in seconds (default: 300)
+    --timeout       Overall time limit in seconds, counted from the start of
+                    submission rather than per workflow (default: 300)
 """
 
 import argparse
 import asyncio
 import aiohttp
+import orjson
+import sys
 import time
 import os
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 from dataclasses import dataclass, field
 from enum import Enum
 
 
+# Most instances sent in one batch status request (the function app's
+# MAX_STATUS_BATCH_IDS)
+STATUS_BATCH_SIZE = 100
+
+# Longest an unchanged instance waits between status checks (the per-instance
+# interval doubles from --poll-interval while its status stays the same)
+MAX_POLL_INTERVAL = 30.0
+
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+STATUS_QUERY_PARAMS = {"showInput": "false"}
+
+# Bytes of a failed response's body included in the error message
+ERROR_BODY_PREVIEW_BYTES = 512
+
+
 class WorkflowStatus(Enum):
     PENDING = "Pending"
     RUNNING = "Running"
@@ -38,6 +59,15 @@ class WorkflowStatus(Enum):
     UNKNOWN = "Unknown"
 
 
+# Statuses that still need polling, and statuses that set end_time
+ACTIVE_STATUSES = (WorkflowStatus.PENDING, WorkflowStatus.RUNNING)
+FINISHED_STATUSES = (
+    WorkflowStatus.COMPLETED,
+    WorkflowStatus.FAILED,
+    WorkflowStatus.TERMINATED,
+)
+
+
 @dataclass
 class WorkflowInstance:
     """Tracks a single workflow instance."""
@@ -50,6 +80,8 @@ class WorkflowInstance:
     status: WorkflowStatus = WorkflowStatus.PENDING
     result: Optional[Dict] = None
     error: Optional[str] = None
+    next_poll_at: float = 0.0
+    poll_backoff: float = 0.0
 
 
 @dataclass
@@ -63,6 +95,37 @@ class LoadTestResults:
     start_time: float = 0
     end_time: float = 0
     instances: List[WorkflowInstance] = field(default_factory=list)
+    # Index of instance IDs by status, kept up to date on every transition, so
+    # counts and the pending/running set don't require scanning all instances
+    by_status: Dict[WorkflowStatus, Set[str]] = field(
+        default_factory=lambda: defaultdict(set)
+    )
+    by_id: Dict[str, WorkflowInstance] = field(default_factory=dict)
+
+    def add(self, instance: WorkflowInstance) -> None:
+        """Record a newly submitted instance."""
+        self.instances.append(instance)
+        self.by_id[instance.instance_id] = instance
+        self.by_status[instance.status].add(instance.instance_id)
+        self.total_submitted += 1
+
+    def set_status(self, instance: WorkflowInstance, status: WorkflowStatus) -> None:
+        """Move an instance to a new status, keeping the index in sync."""
+        self.by_status[instance.status].discard(instance.instance_id)
+        self.by_status[status].add(instance.instance_id)
+        instance.status = status
+
+    def count(self, *statuses: WorkflowStatus) -> int:
+        """Number of instances currently in any of the given statuses."""
+        return sum(len(self.by_status[status]) for status in statuses)
+
+    def with_status(self, *statuses: WorkflowStatus) -> List[WorkflowInstance]:
+        """Instances currently in any of the given statuses."""
+        return [
+            self.by_id[instance_id]
+            for status in statuses
+            for instance_id in self.by_status[status]
+        ]
 
     @property
     def duration(self) -> float:
@@ -76,7 +139,7 @@ class LoadTestResults:
 
     @property
     def avg_duration(self) -> float:
-        completed = [i for i in self.instances if i.end_time]
+        completed = self.with_status(*FINISHED_STATUSES)
         if not completed:
             return 0
         return sum(i.end_time - i.start_time for i in completed) / len(completed)
@@ -93,6 +156,24 @@ class LoadTester:
         self.base_url = base_url.rstrip("/")
         self.pdf_path = pdf_path
         self.results = LoadTestResults()
+        self._resolved_pdf_path = self._resolve_pdf_path(pdf_path)
+
+    @staticmethod
+    def _resolve_pdf_path(pdf_path: Optional[str]) -> Optional[str]:
+        """Pick the PDF to submit: the given path, else the sample in data/."""
+        if pdf_path and os.path.exists(pdf_path):
+            return pdf_path
+
+        # Use a default test PDF path
+        default_pdf = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)), "data", "sample_invoice.pdf"
+        )
+        if os.path.exists(default_pdf):
+            return default_pdf
+
+        # If no PDF available, the workflows will fail but we can still test submission
+        print("Warning: No PDF found, workflows may fail")
+        return None
 
     async def initialize_storage(self, session: aiohttp.ClientSession) -> bool:
         """Call the startup endpoint to initialize storage containers."""
@@ -100,7 +181,7 @@ class LoadTester:
             url = f"{self.base_url}/api/startup"
             async with session.get(url) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = orjson.loads(await response.read())
                     print(f"✓ Storage initialized: {data.get('message', 'OK')}")
                     return True
                 else:
@@ -127,26 +208,16 @@ class LoadTester:
             },
         }
 
-        # Add PDF source
-        if self.pdf_path and os.path.exists(self.pdf_path):
-            body["pdf_path"] = self.pdf_path
-        else:
-            # Use a default test PDF path
-            default_pdf = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)), "data", "sample_invoice.pdf"
-            )
-            if os.path.exists(default_pdf):
-                body["pdf_path"] = default_pdf
-            else:
-                # If no PDF available, the workflow will fail but we can still test submission
-                print(f"  Warning: No PDF found, workflow may fail for {invoice_id}")
-                body["pdf_path"] = "test.pdf"  # Placeholder
+        # Add PDF source (resolved once in __init__)
+        body["pdf_path"] = self._resolved_pdf_path or "test.pdf"  # Placeholder
 
         try:
             start_time = time.time()
-            async with session.post(url, json=body) as response:
+            async with session.post(
+                url, data=orjson.dumps(body), headers=JSON_HEADERS
+            ) as response:
                 if response.status == 202:  # Accepted
-                    data = await response.json()
+                    data = orjson.loads(await response.read())
                     instance = WorkflowInstance(
                         instance_id=data.get("id", "unknown"),
                         invoice_id=invoice_id,
@@ -155,15 +226,46 @@ class LoadTester:
                     )
                     return instance
                 else:
-                    text = await response.text()
+                    # Only the start of the body: error pages can be large
+                    preview = await response.content.read(ERROR_BODY_PREVIEW_BYTES)
+                    text = preview.decode("utf-8", errors="replace")
                     print(
-                        f"  ✗ Failed to submit {invoice_id}: {response.status} - {text}"
+                        f"  ✗ Failed to submit {invoice_id}: "
+                        f"{response.status} {response.reason} - {text}"
                     )
                     return None
         except Exception as e:
             print(f"  ✗ Error submitting {invoice_id}: {e}")
             return None
 
+    def apply_status(
+        self,
+        instance: WorkflowInstance,
+        runtime_status: str,
+        output: Optional[Dict],
+    ) -> WorkflowStatus:
+        """Update an instance from a reported runtimeStatus and output."""
+        if runtime_status == "Completed":
+            status = WorkflowStatus.COMPLETED
+            instance.end_time = time.time()
+            instance.result = output
+        elif runtime_status == "Failed":
+            status = WorkflowStatus.FAILED
+            instance.end_time = time.time()
+            instance.error = output or "Unknown error"
+        elif runtime_status == "Running":
+            status = WorkflowStatus.RUNNING
+        elif runtime_status == "Pending":
+            status = WorkflowStatus.PENDING
+        elif runtime_status == "Terminated":
+            status = WorkflowStatus.TERMINATED
+            instance.end_time = time.time()
+        else:
+            status = WorkflowStatus.UNKNOWN
+
+        self.results.set_status(instance, status)
+        return status
+
     async def check_status(
         self,
         session: aiohttp.ClientSession,
@@ -174,61 +276,98 @@ class LoadTester:
             return WorkflowStatus.UNKNOWN
 
         try:
-            async with session.get(instance.status_url) as response:
+            # The status endpoint echoes the orchestration input by default,
+            # which can carry a whole inline PDF; only status and output are used
+            async with session.get(
+                instance.status_url, params=STATUS_QUERY_PARAMS
+            ) as response:
                 if response.status == 200:
-                    data = await response.json()
-                    runtime_status = data.get("runtimeStatus", "Unknown")
-
-                    if runtime_status == "Completed":
-                        instance.status = WorkflowStatus.COMPLETED
-                        instance.end_time = time.time()
-                        instance.result = data.get("output")
-                    elif runtime_status == "Failed":
-                        instance.status = WorkflowStatus.FAILED
-                        instance.end_time = time.time()
-                        instance.error = data.get("output", "Unknown error")
-                    elif runtime_status == "Running":
-                        instance.status = WorkflowStatus.RUNNING
-                    elif runtime_status == "Pending":
-                        instance.status = WorkflowStatus.PENDING
-                    elif runtime_status == "Terminated":
-                        instance.status = WorkflowStatus.TERMINATED
-                        instance.end_time = time.time()
-                    else:
-                        instance.status = WorkflowStatus.UNKNOWN
-
-                    return instance.status
+                    data = orjson.loads(await response.read())
+                    return self.apply_status(
+                        instance,
+                        data.get("runtimeStatus", "Unknown"),
+                        data.get("output"),
+                    )
                 else:
                     return WorkflowStatus.UNKNOWN
         except Exception as e:
             print(f"  Warning: Error checking status for {instance.invoice_id}: {e}")
             return WorkflowStatus.UNKNOWN
 
+    async def check_status_batch(
+        self,
+        session: aiohttp.ClientSession,
+        instances: List[WorkflowInstance],
+    ) -> bool:
+        """
+        Check the status of several workflow instances with one request.
+
+        Returns False if the function app has no batch status endpoint, so the
+        caller can fall back to per-instance checks.
+        """
+        url = f"{self.base_url}/api/invoice/status/batch"
+        by_id = {instance.instance_id: instance for instance in instances}
+
+        try:
+            async with session.post(
+                url, data=orjson.dumps({"ids": list(by_id)}), headers=JSON_HEADERS
+            ) as response:
+                if response.status == 404:
+                    return False
+                if response.status == 200:
+                    for entry in orjson.loads(await response.read()):
+                        instance = by_id.get(entry.get("id"))
+                        # runtimeStatus is null until the instance is visible
+                        if instance and entry.get("runtimeStatus"):
+                            self.apply_status(
+                                instance, entry["runtimeStatus"], entry.get("output")
+                            )
+                else:
+                    print(f"  Warning: Batch status check failed: {response.status}")
+        except Exception as e:
+            print(f"  Warning: Error checking batch status: {e}")
+
+        return True
+
+    @staticmethod
+    def _next_poll_delay(
+        instances: List[WorkflowInstance],
+        poll_interval: float,
+        submitting: bool,
+    ) -> float:
+        """Seconds until the next instance is due for a status check."""
+        pending_running = [i for i in instances if i.status in ACTIVE_STATUSES]
+        if not pending_running:
+            return poll_interval
+        delay = max(0.0, min(i.next_poll_at for i in pending_running) - time.time())
+        # New submissions may arrive at any time; look for them every interval
+        return min(delay, poll_interval) if submitting else delay
+
     async def run_load_test(
         self,
         total: int = 10,
         batch_size: int = 3,
-        delay: float = 2.0,
+        delay: float = 0.0,
         poll_interval: float = 5.0,
         timeout: float = 300.0,
     ) -> LoadTestResults:
         """
-        Run the load test with incremental batch submission.
+        Run the load test with bounded-concurrency submission.
 
         Args:
             total: Total number of workflows to submit
-            batch_size: Number of workflows per batch
-            delay: Delay between batches in seconds
+            batch_size: Maximum number of submissions in flight at once
+            delay: Pause after each submission before its slot is released
             poll_interval: How often to poll for status
-            timeout: Maximum time to wait for completion
+            timeout: Maximum time to wait for completion, from the first submission
         """
         print("\n" + "=" * 60)
         print("Invoice Processing Workflow - Load Test")
         print("=" * 60)
         print(f"Base URL: {self.base_url}")
         print(f"Total workflows: {total}")
-        print(f"Batch size: {batch_size}")
-        print(f"Delay between batches: {delay}s")
+        print(f"Max in-flight submissions: {batch_size}")
+        print(f"Delay after each submission: {delay}s")
         print(f"Poll interval: {poll_interval}s")
         print(f"Timeout: {timeout}s")
         print("=" * 60 + "\n")
@@ -236,115 +375,173 @@ class LoadTester:
         self.results = LoadTestResults()
         self.results.start_time = time.time()
 
-        async with aiohttp.ClientSession() as session:
+        # All invoice IDs up front; one timestamp per run, so they share a prefix
+        run_ts = datetime.now().strftime("%Y%m%d%H%M%S")
+        invoice_ids = [f"LOAD-TEST-{run_ts}-{k + 1:04d}" for k in range(total)]
+
+        # Resolve names asynchronously with aiodns when it is installed,
+        # instead of getaddrinfo in the default resolver's thread pool
+        try:
+            resolver = aiohttp.AsyncResolver()
+        except RuntimeError:
+            resolver = None
+
+        # One keep-alive pool for every submit/poll against the function app,
+        # with DNS results cached so repeated polls skip name resolution
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=32,
+            keepalive_timeout=75,
+            resolver=resolver,
+            use_dns_cache=True,
+            ttl_dns_cache=600,
+            enable_cleanup_closed=True,
+        )
+        session_timeout = aiohttp.ClientTimeout(total=60, connect=10)
+
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=session_timeout
+        ) as session:
             # Initialize storage
             print("Initializing storage...")
             if not await self.initialize_storage(session):
                 print("Warning: Storage initialization failed, continuing anyway...")
 
-            # Submit workflows in batches
+            # Submit workflows: at most batch_size in flight, and a new
+            # submission starts as soon as any earlier one finishes
             print("\nSubmitting workflows...")
-            batch_num = 0
-            for i in range(0, total, batch_size):
-                batch_num += 1
-                batch_end = min(i + batch_size, total)
-                current_batch_size = batch_end - i
-
-                print(
-                    f"\nBatch {batch_num}: Submitting {current_batch_size} workflows..."
-                )
-
-                # Submit batch in parallel
-                tasks = []
-                for j in range(i, batch_end):
-                    invoice_id = f"LOAD-TEST-{datetime.now().strftime('%Y%m%d%H%M%S')}-{j + 1:04d}"
-                    tasks.append(self.submit_workflow(session, invoice_id))
-
-                instances = await asyncio.gather(*tasks)
+            sem = asyncio.Semaphore(batch_size)
+            start_poll = time.time()
+            submitting = True
 
-                for instance in instances:
+            async def bounded_submit(invoice_id: str) -> None:
+                async with sem:
+                    instance = await self.submit_workflow(session, invoice_id)
                     if instance:
-                        self.results.instances.append(instance)
-                        self.results.total_submitted += 1
+                        instance.poll_backoff = poll_interval
+                        instance.next_poll_at = instance.start_time + poll_interval
+                        self.results.add(instance)
                         print(
                             f"  ✓ Submitted: {instance.invoice_id} (ID: {instance.instance_id[:8]}...)"
                         )
+                    if delay:
+                        await asyncio.sleep(delay)
+
+            # One poller runs alongside submission, so early submissions are
+            # tracked right away, and each cycle asks for the status of every
+            # pending/running instance in batched requests
+            async def poll() -> None:
+                use_batch = True
+                status_sem = asyncio.Semaphore(8)
+
+                async def bounded_check(instance: WorkflowInstance) -> None:
+                    async with status_sem:
+                        await self.check_status(session, instance)
+
+                max_backoff = max(poll_interval, MAX_POLL_INTERVAL)
+                next_sleep = poll_interval
+                interactive = sys.stdout.isatty()
+                last_counts = None
+
+                while True:
+                    await asyncio.sleep(next_sleep)
+                    next_sleep = poll_interval
+
+                    pending_running = self.results.with_status(*ACTIVE_STATUSES)
+                    if not pending_running:
+                        if submitting:
+                            continue
+                        break
+
+                    # Only check instances whose backoff has elapsed
+                    now = time.time()
+                    due = [i for i in pending_running if i.next_poll_at <= now]
+                    if not due:
+                        next_sleep = self._next_poll_delay(
+                            pending_running, poll_interval, submitting
+                        )
+                        continue
+                    previous = [i.status for i in due]
+
+                    # Update status
+                    if use_batch:
+                        for k in range(0, len(due), STATUS_BATCH_SIZE):
+                            chunk = due[k : k + STATUS_BATCH_SIZE]
+                            if not await self.check_status_batch(session, chunk):
+                                use_batch = False
+                                break
+                    if not use_batch:
+                        # No batch endpoint: one request per instance, capped
+                        # so a large run doesn't stampede the status API
+                        await asyncio.gather(*(bounded_check(i) for i in due))
+
+                    # Back off while an instance's status is unchanged, and go
+                    # back to the base interval once it changes
+                    checked_at = time.time()
+                    for instance, status in zip(due, previous):
+                        if instance.status == status:
+                            instance.poll_backoff = min(
+                                instance.poll_backoff * 2, max_backoff
+                            )
+                        else:
+                            instance.poll_backoff = poll_interval
+                        instance.next_poll_at = checked_at + instance.poll_backoff
+
+                    # Count statuses
+                    completed = self.results.count(WorkflowStatus.COMPLETED)
+                    failed = self.results.count(
+                        WorkflowStatus.FAILED, WorkflowStatus.TERMINATED
+                    )
+                    running = self.results.count(WorkflowStatus.RUNNING)
+                    pending = self.results.count(WorkflowStatus.PENDING)
+
+                    # Only report when the counts change: an in-place line
+                    # on a terminal, one line per change when redirected
+                    counts = (completed, failed, running, pending)
+                    if counts != last_counts:
+                        last_counts = counts
+                        elapsed = time.time() - start_poll
+                        line = f"  [{elapsed:.0f}s] Completed: {completed}, Failed: {failed}, Running: {running}, Pending: {pending}"
+                        if interactive:
+                            sys.stdout.write(f"\r{line}   ")
+                            sys.stdout.flush()
+                        else:
+                            sys.stdout.write(f"{line}\n")
+
+                    next_sleep = self._next_poll_delay(
+                        pending_running, poll_interval, submitting
+                    )
 
-                # Delay before next batch (except for last batch)
-                if batch_end < total:
-                    print(f"  Waiting {delay}s before next batch...")
-                    await asyncio.sleep(delay)
-
-            # Poll for completion
-            print(f"\n\nPolling for completion (timeout: {timeout}s)...")
-            start_poll = time.time()
-
-            while time.time() - start_poll < timeout:
-                # Check status of all pending/running instances
-                pending_running = [
-                    i
-                    for i in self.results.instances
-                    if i.status in (WorkflowStatus.PENDING, WorkflowStatus.RUNNING)
-                ]
-
-                if not pending_running:
-                    break
-
-                # Update status
-                for instance in pending_running:
-                    await self.check_status(session, instance)
-
-                # Count statuses
-                completed = sum(
-                    1
-                    for i in self.results.instances
-                    if i.status == WorkflowStatus.COMPLETED
-                )
-                failed = sum(
-                    1
-                    for i in self.results.instances
-                    if i.status in (WorkflowStatus.FAILED, WorkflowStatus.TERMINATED)
-                )
-                running = sum(
-                    1
-                    for i in self.results.instances
-                    if i.status == WorkflowStatus.RUNNING
-                )
-                pending = sum(
-                    1
-                    for i in self.results.instances
-                    if i.status == WorkflowStatus.PENDING
-                )
+            poller = asyncio.create_task(poll())
 
-                elapsed = time.time() - start_poll
-                print(
-                    f"\r  [{elapsed:.0f}s] Completed: {completed}, Failed: {failed}, Running: {running}, Pending: {pending}   ",
-                    end="",
-                    flush=True,
-                )
-
-                if not pending_running:
-                    break
+            # The task group cancels the remaining submissions as soon as one
+            # fails unexpectedly (or on Ctrl-C), instead of letting them run on
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    for invoice_id in invoice_ids:
+                        tg.create_task(bounded_submit(invoice_id))
+            except* Exception as eg:
+                print(f"  ✗ Submission aborted: {eg.exceptions[0]!r}")
+            submitting = False
 
-                await asyncio.sleep(poll_interval)
+            # Wait for completion; stop polling whatever hasn't finished
+            # within the timeout
+            print(f"\n\nPolling for completion (timeout: {timeout}s)...")
+            remaining = max(0.0, timeout - (time.time() - start_poll))
+            try:
+                await asyncio.wait_for(poller, timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
 
             print()  # New line after polling
 
         # Calculate final results
         self.results.end_time = time.time()
-        self.results.total_completed = sum(
-            1 for i in self.results.instances if i.status == WorkflowStatus.COMPLETED
-        )
-        self.results.total_failed = sum(
-            1
-            for i in self.results.instances
-            if i.status in (WorkflowStatus.FAILED, WorkflowStatus.TERMINATED)
-        )
-        self.results.total_running = sum(
-            1
-            for i in self.results.instances
-            if i.status in (WorkflowStatus.RUNNING, WorkflowStatus.PENDING)
+        self.results.total_completed = self.results.count(WorkflowStatus.COMPLETED)
+        self.results.total_failed = self.results.count(
+            WorkflowStatus.FAILED, WorkflowStatus.TERMINATED
         )
+        self.results.total_running = self.results.count(*ACTIVE_STATUSES)
 
         return self.results
 
@@ -394,10 +591,19 @@ async def main():
         "--total", type=int, default=10, help="Total number of workflows to submit"
     )
     parser.add_argument(
-        "--batch-size", type=int, default=3, help="Number of workflows per batch"
+        "--batch-size",
+        type=int,
+        default=3,
+        help="Maximum number of submissions in flight at once",
     )
     parser.add_argument(
-        "--delay", type=float, default=2.0, help="Delay between batches in seconds"
+        "--delay",
+        type=float,
+        default=0.0,
+        help=(
+            "Pause after each submission before its in-flight slot is released, "
+            "in seconds (default: 0, no throttle)"
+        ),
     )
     parser.add_argument(
         "--poll-interval",
@@ -409,7 +615,10 @@ async def main():
         "--timeout",
         type=float,
         default=300.0,
-        help="Maximum time to wait for all workflows in seconds",
+        help=(
+            "Overall time limit in seconds, counted from the start of submission; "
+            "workflows still running then are reported as running"
+        ),
     )
 
     args = parser.parse_args()
@@ -431,4 +640,12 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Use uvloop when it is installed (POSIX only); otherwise the default loop
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
     asyncio.run(main())
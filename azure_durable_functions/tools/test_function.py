@@ -6,17 +6,17 @@ Usage:
     uv run test_function.py [--base-url URL]
 """
 
-import requests
 import argparse
 import sys
 
+import httpx
 
-def test_startup(base_url: str) -> bool:
+
+def test_startup(client: httpx.Client) -> bool:
     """Test the startup endpoint."""
     print(f"\n1. Testing startup endpoint...")
     try:
-        url = f"{base_url}/api/startup"
-        response = requests.get(url, timeout=30)
+        response = client.get("/api/startup")
 
         if response.status_code == 200:
             data = response.json()
@@ -27,22 +27,24 @@ def test_startup(base_url: str) -> bool:
         else:
             print(f"   ✗ Failed: {response.status_code} - {response.text}")
             return False
-    except requests.exceptions.ConnectionError:
-        print(f"   ✗ Connection error - is the function app running at {base_url}?")
+    except httpx.ConnectError:
+        print(
+            f"   ✗ Connection error - is the function app running at {client.base_url}?"
+        )
         return False
     except Exception as e:
         print(f"   ✗ Error: {e}")
         return False
 
 
-def test_process_endpoint_validation(base_url: str) -> bool:
+def test_process_endpoint_validation(client: httpx.Client) -> bool:
     """Test the process endpoint validation."""
     print(f"\n2. Testing process endpoint validation...")
 
     # Test missing invoice_id
     try:
-        url = f"{base_url}/api/invoice/process"
-        response = requests.post(url, json={}, timeout=30)
+        url = "/api/invoice/process"
+        response = client.post(url, json={})
 
         if response.status_code == 400:
             data = response.json()
@@ -59,7 +61,7 @@ def test_process_endpoint_validation(base_url: str) -> bool:
 
     # Test missing PDF source
     try:
-        response = requests.post(url, json={"invoice_id": "TEST-001"}, timeout=30)
+        response = client.post(url, json={"invoice_id": "TEST-001"})
 
         if response.status_code == 400:
             data = response.json()
@@ -77,7 +79,7 @@ def test_process_endpoint_validation(base_url: str) -> bool:
     return True
 
 
-def test_submit_workflow(base_url: str, pdf_path: str = None) -> str:
+def test_submit_workflow(client: httpx.Client, pdf_path: str = None) -> str:
     """Test submitting a workflow (returns instance_id or empty string)."""
     print(f"\n3. Testing workflow submission...")
 
@@ -86,14 +88,13 @@ def test_submit_workflow(base_url: str, pdf_path: str = None) -> str:
         return ""
 
     try:
-        url = f"{base_url}/api/invoice/process"
         body = {
             "invoice_id": "TEST-VERIFICATION-001",
             "pdf_path": pdf_path,
             "metadata": {"test": True},
         }
 
-        response = requests.post(url, json=body, timeout=30)
+        response = client.post("/api/invoice/process", json=body)
 
         if response.status_code == 202:
             data = response.json()
@@ -110,15 +111,15 @@ def test_submit_workflow(base_url: str, pdf_path: str = None) -> str:
         return ""
 
 
-def test_check_status(base_url: str, instance_id: str) -> bool:
+def test_check_status(client: httpx.Client, instance_id: str) -> bool:
     """Test checking workflow status."""
     if not instance_id:
         return True
 
     print(f"\n4. Testing status check...")
     try:
-        url = f"{base_url}/runtime/webhooks/durabletask/instances/{instance_id}"
-        response = requests.get(url, timeout=30)
+        url = f"/runtime/webhooks/durabletask/instances/{instance_id}"
+        response = client.get(url)
 
         # 200 = completed, 202 = still running (both are valid)
         if response.status_code in (200, 202):
@@ -160,21 +161,29 @@ def main():
 
     all_passed = True
 
-    # Test 1: Startup
-    if not test_startup(args.base_url):
-        all_passed = False
+    # One pooled client for all tests, so calls after the first reuse the
+    # connection (multiplexed over HTTP/2 when the endpoint negotiates it)
+    with httpx.Client(
+        base_url=args.base_url,
+        http2=True,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    ) as client:
+        # Test 1: Startup
+        if not test_startup(client):
+            all_passed = False
 
-    # Test 2: Validation
-    if not test_process_endpoint_validation(args.base_url):
-        all_passed = False
+        # Test 2: Validation
+        if not test_process_endpoint_validation(client):
+            all_passed = False
 
-    # Test 3: Submit (if PDF provided)
-    instance_id = test_submit_workflow(args.base_url, args.pdf_path)
+        # Test 3: Submit (if PDF provided)
+        instance_id = test_submit_workflow(client, args.pdf_path)
 
-    # Test 4: Status check
-    if instance_id:
-        if not test_check_status(args.base_url, instance_id):
-            all_passed = False
+        # Test 4: Status check
+        if instance_id:
+            if not test_check_status(client, instance_id):
+                all_passed = False
 
     print("\n" + "=" * 60)
     if all_passed:
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
+import os
 from typing import List
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 from shared.models import AggregatedInvoice, LineItem, PageExtraction
 
-app = FastAPI(title="Aggregate Service", version="0.1.0")
+app = FastAPI(title="Aggregate Service", version="0.1.0", default_response_class=ORJSONResponse)
 
 
 class AggregateRequest(BaseModel):
@@ -39,11 +40,19 @@ async def aggregate_invoice(payload: AggregateRequest) -> AggregatedInvoice:
 
 
 @app.get("/healthz")
-async def health() -> JSONResponse:
-    return JSONResponse({"status": "ok"})
+async def health() -> dict[str, str]:
+    return {"status": "ok"}
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("app:app", host="0.0.0.0", port=7401, reload=False)
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=7401,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        reload=False,
+    )
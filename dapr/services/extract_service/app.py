@@ -1,53 +1,75 @@
 from __future__ import annotations
 
+import os
+
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
-from shared.models import LineItem, PageExtraction, PageMetadata
+from shared.models import PageExtraction, PageMetadata
 
-app = FastAPI(title="Extract Service", version="0.1.0")
+app = FastAPI(title="Extract Service", version="0.1.0", default_response_class=ORJSONResponse)
 
 
-def _mock_line_items(page: PageMetadata) -> list[LineItem]:
+def _mock_line_items(page: PageMetadata) -> tuple[list[dict], float]:
+    # Plain dicts: FastAPI validates the response against PageExtraction once,
+    # so building LineItem models here would only duplicate that work.
     base = 100.0 + (page.page_number * 5)
-    return [
-        LineItem(
-            description=f"Page {page.page_number} line 1",
-            quantity=1,
-            unit_price=base,
-            amount=base,
-        ),
-        LineItem(
-            description=f"Page {page.page_number} line 2",
-            quantity=2,
-            unit_price=base / 2,
-            amount=base,
-        ),
+    line_items = [
+        {
+            "description": f"Page {page.page_number} line 1",
+            "quantity": 1,
+            "unit_price": base,
+            "amount": base,
+        },
+        {
+            "description": f"Page {page.page_number} line 2",
+            "quantity": 2,
+            "unit_price": base / 2,
+            "amount": base,
+        },
     ]
+    return line_items, base * 2
 
 
-@app.post("/extract", response_model=PageExtraction)
-async def extract_page(page: PageMetadata) -> PageExtraction:
-    line_items = _mock_line_items(page)
-    total_amount = sum(item.amount for item in line_items)
+def _extract(page: PageMetadata) -> dict:
+    line_items, total_amount = _mock_line_items(page)
     vendor = f"Vendor-{page.invoice_id[:4].upper()}"
     confidence = 0.85 + (page.page_number * 0.02)
-    return PageExtraction(
-        invoice_id=page.invoice_id,
-        page_number=page.page_number,
-        vendor=vendor,
-        total_amount=round(total_amount, 2),
-        line_items=line_items,
-        confidence=min(confidence, 0.99),
-    )
+    return {
+        "invoice_id": page.invoice_id,
+        "page_number": page.page_number,
+        "vendor": vendor,
+        "total_amount": round(total_amount, 2),
+        "line_items": line_items,
+        "confidence": min(confidence, 0.99),
+    }
+
+
+@app.post("/extract", response_model=PageExtraction)
+async def extract_page(page: PageMetadata) -> dict:
+    return _extract(page)
+
+
+@app.post("/extract_batch", response_model=list[PageExtraction])
+async def extract_batch(pages: list[PageMetadata]) -> list[dict]:
+    # One request and one validation pass for a whole batch of pages
+    return [_extract(page) for page in pages]
 
 
 @app.get("/health")
-async def health() -> JSONResponse:
-    return JSONResponse({"status": "ok"})
+async def health() -> dict[str, str]:
+    return {"status": "ok"}
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("app:app", host="0.0.0.0", port=7301, reload=False)
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=7301,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+        reload=False,
+    )
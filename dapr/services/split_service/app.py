@@ -1,52 +1,83 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from shared.models import PageMetadata, SplitResult, UploadResult
 
 ARTIFACT_ROOT = Path(os.getenv("ARTIFACT_DIR", "/artifacts"))
 
-app = FastAPI(title="Split Service", version="0.1.0")
+app = FastAPI(title="Split Service", version="0.1.0", default_response_class=ORJSONResponse)
 
 IMAGES_ROOT = (ARTIFACT_ROOT / "images").resolve()
 IMAGES_ROOT.mkdir(parents=True, exist_ok=True)
 
+# Path strings used on every request, computed once at import
+_IMAGES_ROOT_STR = str(IMAGES_ROOT)
+_IMAGES_REL_PREFIX = str(IMAGES_ROOT.relative_to(ARTIFACT_ROOT))
+
+_PLACEHOLDER = b"placeholder image bytes"
+
+
+def _write_page_images(invoice_dir: str, filenames: list[str]) -> None:
+    """Create the invoice directory and write all page images (blocking I/O)."""
+    # IMAGES_ROOT exists from import time, so usually only the leaf needs
+    # creating; ids containing "/" need the intermediate directories too
+    try:
+        os.mkdir(invoice_dir)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        os.makedirs(invoice_dir, exist_ok=True)
+    for filename in filenames:
+        # Unbuffered: the payload is tiny, so write it straight through
+        with open(f"{invoice_dir}/{filename}", "wb", buffering=0) as image_file:
+            image_file.write(_PLACEHOLDER)
+
 
 @app.post("/split", response_model=SplitResult)
 async def split_pdf(upload: UploadResult) -> SplitResult:
     if upload.page_count <= 0:
         raise HTTPException(status_code=400, detail="page_count must be > 0")
 
-    invoice_dir = IMAGES_ROOT / upload.invoice_id
-    invoice_dir.mkdir(parents=True, exist_ok=True)
-
-    pages: list[PageMetadata] = []
-    for idx in range(upload.page_count):
-        page_num = idx + 1
-        image_path = invoice_dir / f"page_{page_num}.png"
-        image_path.write_text("placeholder image bytes", encoding="utf-8")
-        pages.append(
-            PageMetadata(
-                invoice_id=upload.invoice_id,
-                page_number=page_num,
-                blob_path=upload.blob_path,
-                image_path=str(image_path.relative_to(ARTIFACT_ROOT)),
-            )
+    invoice_dir_str = f"{_IMAGES_ROOT_STR}/{upload.invoice_id}"
+    rel_prefix = f"{_IMAGES_REL_PREFIX}/{upload.invoice_id}"
+    filenames = [f"page_{page_num}.png" for page_num in range(1, upload.page_count + 1)]
+
+    # Do all file writes in one worker thread so the event loop stays free
+    await asyncio.to_thread(_write_page_images, invoice_dir_str, filenames)
+
+    pages = [
+        PageMetadata(
+            invoice_id=upload.invoice_id,
+            page_number=page_num,
+            blob_path=upload.blob_path,
+            image_path=f"{rel_prefix}/{filename}",
         )
+        for page_num, filename in enumerate(filenames, start=1)
+    ]
 
     return SplitResult(invoice_id=upload.invoice_id, pages=pages)
 
 
 @app.get("/healthz")
-async def health() -> JSONResponse:
-    return JSONResponse({"status": "ok"})
+async def health() -> dict[str, str]:
+    return {"status": "ok"}
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("app:app", host="0.0.0.0", port=7201, reload=False)
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=7201,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        reload=False,
+    )
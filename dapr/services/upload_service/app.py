@@ -1,36 +1,97 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import shutil
+from functools import lru_cache
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from shared.models import InvoiceRequest, UploadResult
 
 SOURCE_BASE_DIR = Path(os.getenv("SOURCE_BASE_DIR", "/data"))
 ARTIFACT_ROOT = Path(os.getenv("ARTIFACT_DIR", "/artifacts"))
 
-app = FastAPI(title="Upload Service", version="0.1.0")
+app = FastAPI(title="Upload Service", version="0.1.0", default_response_class=ORJSONResponse)
 
 BLOB_ROOT = ARTIFACT_ROOT / "blobs"
 BLOB_ROOT.mkdir(parents=True, exist_ok=True)
 
 
+@lru_cache(maxsize=1024)
+def _resolve_source(pdf_path: str) -> Path:
+    # Retries of the same invoice hit this again, so skip the repeated realpath
+    requested_path = Path(pdf_path)
+    return requested_path if requested_path.is_absolute() else (SOURCE_BASE_DIR / requested_path).resolve()
+
+
 def _ensure_pdf(request: InvoiceRequest) -> Path:
     if not request.pdf_path:
         raise HTTPException(status_code=400, detail="pdf_path is required for upload")
-    requested_path = Path(request.pdf_path)
-    source_path = requested_path if requested_path.is_absolute() else (SOURCE_BASE_DIR / requested_path).resolve()
+    source_path = _resolve_source(request.pdf_path)
     if not source_path.exists():
         raise HTTPException(status_code=404, detail=f"PDF not found: {request.pdf_path}")
     return source_path
 
 
-def _determine_page_count(source: Path) -> int:
-    size_kb = max(source.stat().st_size // 1024, 1)
-    return max(1, min(5, size_kb // 32 + 1))
+def _fast_copy(src: Path, dst: Path) -> int:
+    """Copy a file in-kernel, falling back to shutil when unsupported.
+
+    Tries copy_file_range (which can clone extents on CoW filesystems), then
+    sendfile, then shutil.copyfile. Returns the size of the source in bytes.
+    """
+    in_fd = os.open(src, os.O_RDONLY)
+    try:
+        out_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            size = os.fstat(in_fd).st_size
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(in_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+            for copy in (_copy_file_range, _sendfile):
+                try:
+                    copy(in_fd, out_fd, size)
+                    if os.fstat(out_fd).st_size != size:
+                        raise OSError(f"short copy of {src}")
+                    return size
+                except (AttributeError, OSError):
+                    # Unsupported syscall/filesystem or a short copy: restart
+                    # with the next one
+                    os.lseek(in_fd, 0, os.SEEK_SET)
+                    os.lseek(out_fd, 0, os.SEEK_SET)
+                    os.ftruncate(out_fd, 0)
+        finally:
+            os.close(out_fd)
+    finally:
+        os.close(in_fd)
+
+    shutil.copyfile(src, dst)
+    copied = dst.stat().st_size
+    if copied != size:
+        raise OSError(f"copied {copied} of {size} bytes from {src}")
+    return size
+
+
+def _copy_file_range(in_fd: int, out_fd: int, size: int) -> None:
+    remaining = size
+    while remaining > 0:
+        copied = os.copy_file_range(in_fd, out_fd, remaining)
+        if copied == 0:
+            # EOF before size bytes, or a filesystem where copy_file_range is a no-op
+            raise OSError(f"copy_file_range stopped with {remaining} bytes left")
+        remaining -= copied
+
+
+def _sendfile(in_fd: int, out_fd: int, size: int) -> None:
+    remaining = size
+    while remaining > 0:
+        sent = os.sendfile(out_fd, in_fd, None, remaining)
+        if sent == 0:
+            # EOF before size bytes, or a filesystem where sendfile is a no-op
+            raise OSError(f"sendfile stopped with {remaining} bytes left")
+        remaining -= sent
 
 
 @app.post("/upload", response_model=UploadResult)
@@ -39,9 +100,10 @@ async def upload_invoice(request: InvoiceRequest) -> UploadResult:
     target_dir = BLOB_ROOT / request.invoice_id
     target_dir.mkdir(parents=True, exist_ok=True)
     target_file = target_dir / source_path.name
-    shutil.copyfile(source_path, target_file)
+    size = await asyncio.to_thread(_fast_copy, source_path, target_file)
 
-    page_count = _determine_page_count(source_path)
+    # Mock page count from the size already read by the copy (1 page per 32 KiB, max 5)
+    page_count = max(1, min(5, (size // 1024) // 32 + 1))
     relative_blob = str(target_file.relative_to(ARTIFACT_ROOT))
     return UploadResult(
         invoice_id=request.invoice_id,
@@ -52,11 +114,19 @@ async def upload_invoice(request: InvoiceRequest) -> UploadResult:
 
 
 @app.get("/healthz")
-async def health() -> JSONResponse:
-    return JSONResponse({"status": "ok"})
+async def health() -> dict[str, str]:
+    return {"status": "ok"}
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("app:app", host="0.0.0.0", port=7101, reload=False)
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=7101,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        reload=False,
+    )
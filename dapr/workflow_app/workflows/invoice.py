@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-import json
+import os
+import threading
 from datetime import timedelta
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, List
 
+import orjson
 from dapr.clients import DaprClient
-from dapr.ext.workflow import DaprWorkflowContext, WorkflowActivityContext, RetryPolicy
+from dapr.ext.workflow import DaprWorkflowContext, WorkflowActivityContext, RetryPolicy, when_all
 
 from shared.models import InvoiceRequest, PageMetadata, UploadResult
 
@@ -14,61 +16,95 @@ SPLIT_APP_ID = "split-service"
 EXTRACT_APP_ID = "extract-service"
 AGGREGATE_APP_ID = "aggregate-service"
 
-retry_policy = RetryPolicy(max_number_of_attempts=3, first_retry_interval=timedelta(seconds=1))
+# Pages per child workflow when an invoice is fanned out in batches
+BATCH_SIZE = 2
 
+retry_policy = RetryPolicy(max_number_of_attempts=3, first_retry_interval=timedelta(seconds=1))
 
-def _invoke_service(app_id: str, method: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-    with DaprClient() as client:
-        response = client.invoke_method(
-            app_id=app_id,
-            method_name=method,
-            data=json.dumps(payload).encode("utf-8"),
-            content_type="application/json",
-            http_verb="POST",
-        )
-        return json.loads(response.text())
+# Payloads come from the workflow engine already shaped by the services, so
+# re-validating them on every hop is opt-in
+VALIDATE_ACTIVITY_INPUT = bool(os.getenv("VALIDATE_ACTIVITY_INPUT"))
+
+# Shared client (for the activities and app.py's HTTP endpoints) so the
+# sidecar channel is set up once, not per call. Created on first use: DaprClient() waits on the sidecar, which must not
+# happen while app.py imports this module
+_dapr_client: DaprClient | None = None
+_dapr_client_lock = threading.Lock()
+
+
+def get_dapr_client() -> DaprClient:
+    global _dapr_client
+    if _dapr_client is None:
+        with _dapr_client_lock:
+            if _dapr_client is None:
+                _dapr_client = DaprClient()
+    return _dapr_client
+
+
+def close_dapr_client() -> None:
+    global _dapr_client
+    with _dapr_client_lock:
+        if _dapr_client is not None:
+            _dapr_client.close()
+            _dapr_client = None
+
+
+def _invoke_service(app_id: str, method: str, payload: Any) -> Any:
+    response = get_dapr_client().invoke_method(
+        app_id=app_id,
+        method_name=method,
+        data=orjson.dumps(payload),
+        content_type="application/json",
+        http_verb="POST",
+    )
+    return orjson.loads(response.data)
 
 
 def upload_pdf_activity(ctx: WorkflowActivityContext, payload: Dict[str, Any]) -> Dict[str, Any]:
-    request = InvoiceRequest(**payload)
-    return _invoke_service(UPLOAD_APP_ID, "upload", request.model_dump())
+    if VALIDATE_ACTIVITY_INPUT:
+        InvoiceRequest.model_validate(payload)
+    return _invoke_service(UPLOAD_APP_ID, "upload", payload)
 
 
 def split_pdf_activity(ctx: WorkflowActivityContext, payload: Dict[str, Any]) -> Dict[str, Any]:
-    upload = UploadResult(**payload)
-    return _invoke_service(SPLIT_APP_ID, "split", upload.model_dump())
+    if VALIDATE_ACTIVITY_INPUT:
+        UploadResult.model_validate(payload)
+    return _invoke_service(SPLIT_APP_ID, "split", payload)
 
 
 def extract_invoice_activity(ctx: WorkflowActivityContext, payload: Dict[str, Any]) -> Dict[str, Any]:
-    page = PageMetadata(**payload)
-    return _invoke_service(EXTRACT_APP_ID, "extract", page.model_dump())
+    if VALIDATE_ACTIVITY_INPUT:
+        PageMetadata.model_validate(payload)
+    return _invoke_service(EXTRACT_APP_ID, "extract", payload)
+
+
+def extract_batch_activity(ctx: WorkflowActivityContext, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    pages: List[Dict[str, Any]] = payload.get("pages", [])
+    if VALIDATE_ACTIVITY_INPUT:
+        for page in pages:
+            PageMetadata.model_validate(page)
+    return _invoke_service(EXTRACT_APP_ID, "extract_batch", pages)
 
 
 def aggregate_invoice_activity(ctx: WorkflowActivityContext, payload: Dict[str, Any]) -> Dict[str, Any]:
     return _invoke_service(AGGREGATE_APP_ID, "aggregate", payload)
 
 
-def _chunks(iterable: List[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
-    for idx in range(0, len(iterable), size):
-        yield iterable[idx : idx + size]
+def _chunks(items: List[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+    return [items[idx : idx + size] for idx in range(0, len(items), size)]
 
 
 def page_batch_workflow(ctx: DaprWorkflowContext, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    pages: List[Dict[str, Any]] = payload.get("pages", [])
-    results: List[Dict[str, Any]] = []
-    for page in pages:
-        page_result = yield ctx.call_activity(
-            extract_invoice_activity, input=page, retry_policy=retry_policy
-        )
-        results.append(page_result)
+    # The whole batch goes to the extract service in a single call
+    results: List[Dict[str, Any]] = yield ctx.call_activity(
+        extract_batch_activity, input=payload, retry_policy=retry_policy
+    )
     return results
 
 
 def invoice_workflow(ctx: DaprWorkflowContext, wf_input: Dict[str, Any]) -> Dict[str, Any]:
-    request = InvoiceRequest(**wf_input)
-
     upload_result = yield ctx.call_activity(
-        upload_pdf_activity, input=request.model_dump(), retry_policy=retry_policy
+        upload_pdf_activity, input=wf_input, retry_policy=retry_policy
     )
 
     split_result = yield ctx.call_activity(
@@ -78,12 +114,12 @@ def invoice_workflow(ctx: DaprWorkflowContext, wf_input: Dict[str, Any]) -> Dict
     pages: List[Dict[str, Any]] = split_result.get("pages", [])
     page_summaries: List[Dict[str, Any]] = []
 
-    if len(pages) <= 2:
-        for page in pages:
-            page_summary = yield ctx.call_activity(
-                extract_invoice_activity, input=page, retry_policy=retry_policy
-            )
-            page_summaries.append(page_summary)
+    if len(pages) <= BATCH_SIZE:
+        page_tasks = [
+            ctx.call_activity(extract_invoice_activity, input=page, retry_policy=retry_policy)
+            for page in pages
+        ]
+        page_summaries = yield when_all(page_tasks)
     else:
         child_tasks = [
             ctx.call_child_workflow(
@@ -91,13 +127,13 @@ def invoice_workflow(ctx: DaprWorkflowContext, wf_input: Dict[str, Any]) -> Dict
                 input={"pages": batch},
                 retry_policy=retry_policy,
             )
-            for batch in _chunks(pages, size=2)
+            for batch in _chunks(pages, BATCH_SIZE)
         ]
-        for task in child_tasks:
-            batch_result = yield task
+        batch_results = yield when_all(child_tasks)
+        for batch_result in batch_results:
             page_summaries.extend(batch_result)
 
-    aggregate_payload = {"invoice_id": request.invoice_id, "pages": page_summaries}
+    aggregate_payload = {"invoice_id": wf_input["invoice_id"], "pages": page_summaries}
     final_result = yield ctx.call_activity(
         aggregate_invoice_activity, input=aggregate_payload, retry_policy=retry_policy
     )
@@ -3,16 +3,17 @@
 from __future__ import annotations
 
 import argparse
-import json
 import os
+import socket
 from pathlib import Path
-from urllib.error import URLError
-from urllib.request import urlopen
+
+import orjson
 
 from .flow import invoice_processing_flow
 from .models import InvoiceInput
 
 DEFAULT_API_URL = "http://localhost:4200/api"
+DEFAULT_API_ADDRESS = ("127.0.0.1", 4200)
 
 
 def parse_args() -> argparse.Namespace:
@@ -51,31 +52,35 @@ def ensure_prefect_api(api_url: str | None) -> None:
     if os.environ.get("PREFECT_API_URL"):
         return
 
+    # A bare TCP connect is enough to tell whether the server is listening and
+    # returns almost immediately when it is not.
     try:
-        urlopen(f"{DEFAULT_API_URL}/health", timeout=2)
-    except URLError:
-        return
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.1)
+            reachable = sock.connect_ex(DEFAULT_API_ADDRESS) == 0
     except Exception:
         return
 
-    os.environ["PREFECT_API_URL"] = DEFAULT_API_URL
+    if reachable:
+        os.environ["PREFECT_API_URL"] = DEFAULT_API_URL
 
 
 def main() -> None:
     args = parse_args()
     ensure_prefect_api(args.api_url)
-    pdf_bytes = args.pdf.read_bytes()
-
     invoice = InvoiceInput(
         invoice_id=args.invoice_id,
         pdf_filename=args.pdf.name,
-        pdf_bytes=pdf_bytes,
+        pdf_path=str(args.pdf),
+        file_size=args.pdf.stat().st_size,
     )
 
     final_invoice = invoice_processing_flow(invoice)
 
     if args.json:
-        print(json.dumps(final_invoice.model_dump(), indent=2))
+        print(
+            orjson.dumps(final_invoice.model_dump(), option=orjson.OPT_INDENT_2).decode()
+        )
     else:
         print(f"Workflow completed for {final_invoice.invoice_id}")
         print(f"Vendor: {final_invoice.vendor}")
@@ -2,8 +2,6 @@
 
 from __future__ import annotations
 
-from typing import Any
-
 from pydantic import BaseModel, Field
 
 
@@ -12,7 +10,10 @@ class InvoiceInput(BaseModel):
 
     invoice_id: str = Field(..., description="Stable identifier for the invoice run")
     pdf_filename: str = Field(..., description="Original PDF filename")
-    pdf_bytes: bytes = Field(..., description="Raw PDF bytes (base64-decoded)")
+    pdf_path: str = Field(..., description="Path to the PDF file on disk")
+    file_size: int | None = Field(
+        default=None, description="PDF size in bytes (read from disk when omitted)"
+    )
 
 
 class UploadResult(BaseModel):
@@ -44,4 +45,4 @@ class FinalInvoice(BaseModel):
     invoice_date: str | None = None
     confidence_score: float = 0.0
     page_count: int = 0
-    page_results: list[dict[str, Any]] = Field(default_factory=list)
+    page_results: list[ExtractResult] = Field(default_factory=list)
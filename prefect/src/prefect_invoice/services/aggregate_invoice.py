@@ -11,8 +11,13 @@ from ..models import ExtractResult, FinalInvoice
 def aggregate_invoice_activity(invoice_id: str, page_results: list[ExtractResult]) -> FinalInvoice:
     """Combine per-page extraction into a final invoice summary."""
 
-    total_amount = sum(result.amount or 0 for result in page_results)
-    vendor = next((result.vendor for result in page_results if result.vendor), None)
+    total_amount = 0.0
+    vendor = None
+    for result in page_results:
+        if result.amount:
+            total_amount += result.amount
+        if vendor is None and result.vendor:
+            vendor = result.vendor
 
     return FinalInvoice(
         invoice_id=invoice_id,
@@ -21,5 +26,5 @@ def aggregate_invoice_activity(invoice_id: str, page_results: list[ExtractResult
         invoice_date="2025-12-01",
         confidence_score=0.87,
         page_count=len(page_results),
-        page_results=[result.model_dump() for result in page_results],
+        page_results=page_results,
     )
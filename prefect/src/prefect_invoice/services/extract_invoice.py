@@ -8,13 +8,15 @@ from prefect import task
 
 from ..models import ExtractResult
 
+_VENDORS = ("Globex", "Initech", "Umbrella Corp")
+
 
 @task(name="extract_invoice_activity")
 def extract_invoice_activity(invoice_id: str, page_number: int, image_path: str) -> ExtractResult:
     """Mock page-level extraction (simulating LLM/OCR inference)."""
 
     amount = round(100 + random.random() * 50, 2)
-    vendor = random.choice(["Globex", "Initech", "Umbrella Corp"])
+    vendor = random.choice(_VENDORS)
 
     return ExtractResult(
         invoice_id=invoice_id,
@@ -2,10 +2,8 @@
 
 from __future__ import annotations
 
-import random
-import string
+import secrets
 
 
 def generate_blob_path(invoice_id: str, suffix: str = "pdf") -> str:
-    token = "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
-    return f"invoices/{invoice_id}/{token}.{suffix}"
+    return f"invoices/{invoice_id}/{secrets.token_hex(4)}.{suffix}"
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import os
+
 from prefect import task
 
 from ..models import InvoiceInput, UploadResult
@@ -16,5 +18,9 @@ def upload_pdf_activity(invoice: InvoiceInput) -> UploadResult:
     return UploadResult(
         invoice_id=invoice.invoice_id,
         blob_path=blob_path,
-        file_size=len(invoice.pdf_bytes),
+        file_size=(
+            invoice.file_size
+            if invoice.file_size is not None
+            else os.path.getsize(invoice.pdf_path)
+        ),
     )
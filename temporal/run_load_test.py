@@ -15,14 +15,19 @@ Arguments:
     -n, --count     Number of workflows to submit (default: 5)
     -d, --delay     Delay in ms between submissions, 0=burst (default: 0)
     -p, --port      Temporal server port (default: 7233)
+    --pool          Number of client connections to spread submissions over (default: 8)
     -h, --help      Show this help
 """
 
 import argparse
 import asyncio
+import io
 import os
+import sys
 import time
 import uuid
+from dataclasses import dataclass
+from typing import Any
 
 from temporalio.client import Client
 from temporalio.contrib.pydantic import pydantic_data_converter
@@ -32,6 +37,27 @@ from shared.workflow import WorkflowInput
 # Constants
 TASK_QUEUE = "orchestration-q"
 
+# Fields shared by every submission; per-workflow fields are filled in with
+# model_copy(update=...), which skips re-running validation
+INPUT_PROTOTYPE = WorkflowInput.model_construct(
+    plan_id="",
+    blob_container="demo-container",
+    blob_file_path="",
+    correlation_id="",
+)
+
+
+@dataclass(slots=True)
+class WaitResult:
+    """Outcome of waiting on one workflow."""
+
+    id: str
+    ok: bool
+    ms: float
+    result: Any = None
+    error: str | None = None
+
+
 # Box drawing chars (DOS style)
 TL, TR, BL, BR = "+", "+", "+", "+"
 H, V = "-", "|"
@@ -64,6 +90,12 @@ def parse_args() -> argparse.Namespace:
         default=int(os.environ.get("TEMPORAL_PORT", "7233")),
         help="Temporal server port (default: 7233)",
     )
+    parser.add_argument(
+        "--pool",
+        type=int,
+        default=int(os.environ.get("CLIENT_POOL_SIZE", "8")),
+        help="Number of client connections to spread submissions over (default: 8)",
+    )
     parser.add_argument(
         "--host",
         type=str,
@@ -77,19 +109,16 @@ def box(lines: list[str], title: str = "") -> str:
     """Draw a DOS-style box around text."""
     width = max(len(line) for line in lines) + 2
     if title:
-        width = max(width, len(title) + 4)
-
-    result = []
-    if title:
-        result.append(f"{TL}{H * 2} {title} {H * (width - len(title) - 3)}{TR}")
+        title_len = len(title)
+        width = max(width, title_len + 5)
+        top = f"{TL}{H * 2} {title} {H * (width - title_len - 4)}{TR}"
     else:
-        result.append(f"{TL}{H * width}{TR}")
-
-    for line in lines:
-        result.append(f"{V} {line.ljust(width - 2)} {V}")
+        top = f"{TL}{H * width}{TR}"
 
-    result.append(f"{BL}{H * width}{BR}")
-    return "\n".join(result)
+    inner = width - 2
+    return "\n".join(
+        [top, *(f"{V} {line.ljust(inner)} {V}" for line in lines), f"{BL}{H * width}{BR}"]
+    )
 
 
 def banner() -> str:
@@ -107,11 +136,12 @@ async def submit_workflow(client: Client, index: int) -> tuple[str, any]:
     """Submit a single workflow and return (workflow_id, handle)."""
     workflow_id = f"load-{index:02d}-{uuid.uuid4().hex[:6]}"
 
-    workflow_input = WorkflowInput(
-        plan_id=f"PLAN-{index:03d}",
-        blob_container="demo-container",
-        blob_file_path=f"plans/plan_{index}.pdf",
-        correlation_id=workflow_id,
+    workflow_input = INPUT_PROTOTYPE.model_copy(
+        update={
+            "plan_id": f"PLAN-{index:03d}",
+            "blob_file_path": f"plans/plan_{index}.pdf",
+            "correlation_id": workflow_id,
+        }
     )
 
     handle = await client.start_workflow(
@@ -131,6 +161,7 @@ async def main():
     temporal_address = f"{args.host}:{args.port}"
     workflow_count = args.count
     delay_ms = args.delay
+    pool_size = max(1, args.pool)
     mode = "RAMP" if delay_ms > 0 else "BURST"
 
     print(banner())
@@ -140,17 +171,24 @@ async def main():
         f"Mode:       {mode}"
         + (f" ({delay_ms}ms interval)" if delay_ms > 0 else " (parallel)"),
         f"Server:     {temporal_address}",
+        f"Clients:    {pool_size}",
         f"UI:         http://{args.host}:8080",
     ]
     print(box(config_lines, "CONFIG"))
     print()
 
-    # Connect
+    # Connect: several clients so submissions are spread over separate
+    # connections instead of queueing on a single HTTP/2 channel
     print("[....] Connecting to Temporal server", end="", flush=True)
     try:
-        client = await Client.connect(
-            temporal_address,
-            data_converter=pydantic_data_converter,
+        clients = await asyncio.gather(
+            *(
+                Client.connect(
+                    temporal_address,
+                    data_converter=pydantic_data_converter,
+                )
+                for _ in range(pool_size)
+            )
         )
         print("\r[ OK ] Connecting to Temporal server")
     except Exception as e:
@@ -159,23 +197,29 @@ async def main():
 
     # Submit workflows
     print(f"[....] Submitting {workflow_count} workflows", end="", flush=True)
-    submit_start = time.time()
+    submit_start = time.perf_counter_ns()
 
     handles: list[tuple[str, any]] = []
 
     if delay_ms == 0:
         # Burst mode: submit all in parallel
-        tasks = [submit_workflow(client, i + 1) for i in range(workflow_count)]
-        handles = await asyncio.gather(*tasks)
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(submit_workflow(clients[i % pool_size], i + 1))
+                for i in range(workflow_count)
+            ]
+        handles = [task.result() for task in tasks]
     else:
-        # Ramp mode: submit with delay between each
-        for i in range(workflow_count):
-            handle = await submit_workflow(client, i + 1)
-            handles.append(handle)
-            if i < workflow_count - 1:
-                await asyncio.sleep(delay_ms / 1000)
-
-    submit_ms = (time.time() - submit_start) * 1000
+        # Ramp mode: fire each submission at its scheduled tick, so the
+        # start_workflow RTT overlaps with the next interval instead of
+        # adding to it
+        async def tick(i: int) -> tuple[str, any]:
+            await asyncio.sleep(i * delay_ms / 1000)
+            return await submit_workflow(clients[i % pool_size], i + 1)
+
+        handles = await asyncio.gather(*(tick(i) for i in range(workflow_count)))
+
+    submit_ms = (time.perf_counter_ns() - submit_start) / 1_000_000
     print(f"\r[ OK ] Submitted {workflow_count} workflows in {submit_ms:.0f}ms")
 
     # Show workflow IDs
@@ -186,56 +230,53 @@ async def main():
 
     # Wait for completion
     print(f"[....] Awaiting completion", end="", flush=True)
-    exec_start = time.time()
+    exec_start = time.perf_counter_ns()
 
-    async def wait_one(wf_id: str, handle) -> dict:
-        start = time.time()
+    async def wait_one(wf_id: str, handle) -> WaitResult:
+        start = time.perf_counter_ns()
         try:
             result = await handle.result()
-            return {
-                "id": wf_id,
-                "ok": True,
-                "result": result,
-                "ms": (time.time() - start) * 1000,
-            }
+            return WaitResult(
+                wf_id, True, (time.perf_counter_ns() - start) / 1_000_000, result=result
+            )
         except Exception as e:
-            return {
-                "id": wf_id,
-                "ok": False,
-                "error": str(e),
-                "ms": (time.time() - start) * 1000,
-            }
+            return WaitResult(
+                wf_id, False, (time.perf_counter_ns() - start) / 1_000_000, error=str(e)
+            )
 
     wait_tasks = [wait_one(wf_id, h) for wf_id, h in handles]
     results = await asyncio.gather(*wait_tasks)
 
-    exec_ms = (time.time() - exec_start) * 1000
-    completed = sum(1 for r in results if r["ok"])
+    exec_ms = (time.perf_counter_ns() - exec_start) / 1_000_000
+    completed = sum(1 for r in results if r.ok)
     failed = workflow_count - completed
 
     status = "OK" if failed == 0 else "!!"
     print(f"\r[ {status} ] Awaiting completion ({exec_ms:.0f}ms)")
     print()
 
-    # Results table
-    print("  ID                  TIME     PAGES  OCR   STATUS")
-    print("  " + "-" * 52)
+    # Results table: build it in memory and write it out in one go
+    buf = io.StringIO()
+    buf.write("  ID                  TIME     PAGES  OCR   STATUS\n")
+    buf.write("  " + "-" * 52 + "\n")
 
-    for r in sorted(results, key=lambda x: x["ms"]):
-        wf_id = r["id"]
-        ms = r["ms"]
-        if r["ok"]:
-            res = r["result"]
+    for r in sorted(results, key=lambda x: x.ms):
+        wf_id = r.id
+        ms = r.ms
+        if r.ok:
+            res = r.result
             pages = res.get("parse", {}).get("page_count", "?")
             ocr_ok = res.get("ocr", {}).get("successful_pages", "?")
-            print(f"  {wf_id}  {ms:6.0f}ms  {pages:>5}  {ocr_ok:>3}   [OK]")
+            buf.write(f"  {wf_id}  {ms:6.0f}ms  {pages:>5}  {ocr_ok:>3}   [OK]\n")
         else:
-            err = r.get("error", "unknown")[:20]
-            print(f"  {wf_id}  {ms:6.0f}ms  {'--':>5}  {'--':>3}   [FAIL] {err}")
+            err = (r.error or "unknown")[:20]
+            buf.write(f"  {wf_id}  {ms:6.0f}ms  {'--':>5}  {'--':>3}   [FAIL] {err}\n")
+
+    sys.stdout.write(buf.getvalue())
 
     # Summary
     print()
-    avg_ms = sum(r["ms"] for r in results) / len(results) if results else 0
+    avg_ms = sum(r.ms for r in results) / len(results) if results else 0
     throughput = workflow_count / (exec_ms / 1000) if exec_ms > 0 else 0
 
     summary_lines = [
@@ -258,6 +299,12 @@ async def main():
 
 
 if __name__ == "__main__":
-    import sys
+    # uvloop is POSIX-only; fall back to the default event loop elsewhere
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
     sys.exit(asyncio.run(main()))
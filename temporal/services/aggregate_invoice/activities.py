@@ -1,22 +1,44 @@
 """
 Aggregate Invoice Service - Aggregates extracted invoice data from all pages.
 
-Activity: aggregate_invoice_activity
+Activities: aggregate_invoice_activity, extract_and_aggregate_batch_activity
 Task Queue: aggregate-invoice-q
 """
 
-from typing import Any
+import logging
+from operator import attrgetter
+
 from temporalio import activity
 
+from shared.extraction import mock_extract_page
+from shared.payloads import (
+    AggregateInput,
+    ExtractAggregateInput,
+    ExtractPageOutput,
+    FinalInvoice,
+)
+
+logger = logging.getLogger(__name__)
+
+_PAGE_FIELDS = attrgetter("vendor", "amount", "date", "success")
 
 @activity.defn
-async def aggregate_invoice_activity(payload: dict[str, Any]) -> dict[str, Any]:
+async def aggregate_invoice_activity(payload: AggregateInput) -> FinalInvoice:
     """
     Aggregate extracted invoice data from all pages.
     
+    The workflow folds page results as they complete, so this only receives
+    the running totals.
+    
     Input:
         - invoice_id: str
-        - page_results: list[dict] (results from extract_invoice_activity)
+        - page_count: int
+        - successful_pages: int
+        - total_amount: float
+        - vendor: str | None (from the lowest page that had one)
+        - invoice_date: str | None (from the lowest page that had one)
+        - page_results: list[ExtractPageOutput] | None (only from pre-fold
+          workflows; folded here instead)
     
     Returns:
         - invoice_id: str
@@ -26,37 +48,83 @@ async def aggregate_invoice_activity(payload: dict[str, Any]) -> dict[str, Any]:
         - confidence_score: float
         - page_count: int
     """
-    invoice_id = payload.get("invoice_id")
-    page_results = payload.get("page_results", [])
+    if payload.page_results is not None:
+        payload = _fold(payload.invoice_id, payload.page_results)
+    return _finalize(payload)
+
+
+@activity.defn
+async def extract_and_aggregate_batch_activity(payload: ExtractAggregateInput) -> FinalInvoice:
+    """
+    Extract every page and aggregate the results in one activity.
+    
+    Used by the workflow for small invoices, where one round trip through the
+    Temporal server beats N extract activities plus an aggregate activity.
+    
+    Input:
+        - invoice_id: str
+        - page_paths: list[str]
     
+    Returns:
+        - FinalInvoice (same as aggregate_invoice_activity)
+    """
+    invoice_id = payload.invoice_id
+    page_results = [
+        mock_extract_page(invoice_id, page_number)
+        for page_number in range(1, len(payload.page_paths) + 1)
+    ]
+    
+    return _finalize(_fold(invoice_id, page_results))
+
+
+def _fold(invoice_id: str, page_results: list[ExtractPageOutput]) -> AggregateInput:
     # Simple aggregation: take first non-null values
-    vendor = None
+    vendor = invoice_date = None
     total_amount = 0.0
-    invoice_date = None
-    
-    for result in page_results:
-        if vendor is None and result.get("vendor"):
-            vendor = result.get("vendor")
-        if invoice_date is None and result.get("date"):
-            invoice_date = result.get("date")
-        if result.get("amount"):
-            total_amount += result.get("amount", 0)
+    successful = 0
+    for page_vendor, amount, date, success in map(_PAGE_FIELDS, page_results):
+        if vendor is None and page_vendor:
+            vendor = page_vendor
+        if invoice_date is None and date:
+            invoice_date = date
+        if amount:
+            total_amount += amount
+        if success:
+            successful += 1
+
+    return AggregateInput(
+        invoice_id=invoice_id,
+        page_count=len(page_results),
+        successful_pages=successful,
+        total_amount=total_amount,
+        vendor=vendor,
+        invoice_date=invoice_date,
+    )
+
+
+def _finalize(partial: AggregateInput) -> FinalInvoice:
+    invoice_id = partial.invoice_id
+    vendor = partial.vendor
+    total_amount = partial.total_amount
     
     # Mock confidence score (average of successful extractions)
-    successful = sum(1 for r in page_results if r.get("success"))
-    confidence_score = (successful / len(page_results)) if page_results else 0.0
+    confidence_score = (
+        (partial.successful_pages / partial.page_count) if partial.page_count else 0.0
+    )
     
-    print(
-        f"[AGGREGATE_INVOICE] {invoice_id} → "
-        f"Vendor: {vendor}, Amount: ${total_amount:.2f}, "
-        f"Confidence: {confidence_score:.0%}"
+    logger.debug(
+        "[AGGREGATE_INVOICE] %s → Vendor: %s, Amount: $%.2f, Confidence: %.0f%%",
+        invoice_id,
+        vendor,
+        total_amount,
+        confidence_score * 100,
     )
     
-    return {
-        "invoice_id": invoice_id,
-        "vendor": vendor,
-        "total_amount": total_amount,
-        "invoice_date": invoice_date,
-        "confidence_score": confidence_score,
-        "page_count": len(page_results),
-    }
+    return FinalInvoice(
+        invoice_id=invoice_id,
+        vendor=vendor,
+        total_amount=total_amount,
+        invoice_date=partial.invoice_date,
+        confidence_score=confidence_score,
+        page_count=partial.page_count,
+    )
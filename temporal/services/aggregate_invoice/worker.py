@@ -11,14 +11,19 @@ import asyncio
 import logging
 import os
 
-from temporalio.client import Client
-from temporalio.contrib.pydantic import pydantic_data_converter
 from temporalio.worker import Worker
 
-from activities import aggregate_invoice_activity
-from shared.config import TASK_QUEUE_AGGREGATE_INVOICE, TEMPORAL_ADDRESS_LOCAL
+from activities import aggregate_invoice_activity, extract_and_aggregate_batch_activity
+from shared.client import get_temporal_client
+from shared.config import (
+    MAX_CONCURRENT_ACTIVITIES,
+    TASK_QUEUE_AGGREGATE_INVOICE,
+    TEMPORAL_ADDRESS_LOCAL,
+)
+from shared.runtime import install_uvloop
 
 TEMPORAL_ADDRESS = os.environ.get("TEMPORAL_ADDRESS", TEMPORAL_ADDRESS_LOCAL)
+MAX_ACTIVITIES = int(os.environ.get("MAX_CONCURRENT_ACTIVITIES", MAX_CONCURRENT_ACTIVITIES))
 
 # Configure logging
 logging.basicConfig(
@@ -33,18 +38,18 @@ async def main():
     """Start Aggregate Invoice worker."""
     logger.info(f"Connecting to Temporal server at {TEMPORAL_ADDRESS}...")
 
-    client = await Client.connect(
-        TEMPORAL_ADDRESS,
-        data_converter=pydantic_data_converter,
-    )
+    client = await get_temporal_client(TEMPORAL_ADDRESS)
 
     logger.info(f"Starting Aggregate Invoice worker on task queue: {TASK_QUEUE_AGGREGATE_INVOICE}")
-    logger.info("Registered activities: aggregate_invoice_activity")
+    logger.info(
+        "Registered activities: aggregate_invoice_activity, extract_and_aggregate_batch_activity"
+    )
 
     worker = Worker(
         client,
         task_queue=TASK_QUEUE_AGGREGATE_INVOICE,
-        activities=[aggregate_invoice_activity],
+        activities=[aggregate_invoice_activity, extract_and_aggregate_batch_activity],
+        max_concurrent_activities=MAX_ACTIVITIES,
     )
 
     logger.info("Aggregate Invoice worker started. Press Ctrl+C to stop.")
@@ -52,4 +57,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Combined Worker - all activity services in one process (POC / load testing).
+
+Runs one Worker per service task queue (upload, split, extract, aggregate) on a
+single shared Client, so the four services cost one interpreter and one gRPC
+connection instead of four. The per-service workers remain the deployment
+default; this is for local runs where isolation doesn't matter.
+
+Usage (from services/):
+    uv run --project aggregate_invoice python combined_worker.py
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+from pathlib import Path
+
+from temporalio.worker import Worker
+
+from shared.client import get_temporal_client
+from shared.config import (
+    MAX_CONCURRENT_ACTIVITIES,
+    TASK_QUEUE_AGGREGATE_INVOICE,
+    TASK_QUEUE_EXTRACT_INVOICE,
+    TASK_QUEUE_SPLIT_PDF,
+    TASK_QUEUE_UPLOAD_PDF,
+    TEMPORAL_ADDRESS_LOCAL,
+)
+from shared.runtime import install_uvloop
+
+TEMPORAL_ADDRESS = os.environ.get("TEMPORAL_ADDRESS", TEMPORAL_ADDRESS_LOCAL)
+MAX_ACTIVITIES = int(os.environ.get("MAX_CONCURRENT_ACTIVITIES", MAX_CONCURRENT_ACTIVITIES))
+
+SERVICES_DIR = Path(__file__).resolve().parent
+
+# (service directory, task queue, activity names)
+SERVICES = [
+    ("upload_pdf", TASK_QUEUE_UPLOAD_PDF, ["upload_pdf_activity"]),
+    ("split_pdf", TASK_QUEUE_SPLIT_PDF, ["split_pdf_activity"]),
+    ("extract_invoice", TASK_QUEUE_EXTRACT_INVOICE, ["extract_invoice_activity"]),
+    (
+        "aggregate_invoice",
+        TASK_QUEUE_AGGREGATE_INVOICE,
+        ["aggregate_invoice_activity", "extract_and_aggregate_batch_activity"],
+    ),
+]
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger("combined.worker")
+
+
+def load_activities(service: str, names: list[str]) -> list:
+    """Import a service's activities.py under a unique module name."""
+    # Every service names its module "activities", so load each by path
+    spec = importlib.util.spec_from_file_location(
+        f"{service}_activities", SERVICES_DIR / service / "activities.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return [getattr(module, name) for name in names]
+
+
+async def main():
+    """Start all activity workers on one client."""
+    logger.info(f"Connecting to Temporal server at {TEMPORAL_ADDRESS}...")
+
+    client = await get_temporal_client(TEMPORAL_ADDRESS)
+
+    workers = []
+    for service, task_queue, names in SERVICES:
+        logger.info(f"Registering {', '.join(names)} on task queue: {task_queue}")
+        workers.append(
+            Worker(
+                client,
+                task_queue=task_queue,
+                activities=load_activities(service, names),
+                max_concurrent_activities=MAX_ACTIVITIES,
+            )
+        )
+
+    logger.info("Combined worker started. Press Ctrl+C to stop.")
+    await asyncio.gather(*(worker.run() for worker in workers))
+
+
+if __name__ == "__main__":
+    install_uvloop()
+    asyncio.run(main())
@@ -5,12 +5,18 @@ Activity: extract_invoice_activity
 Task Queue: extract-invoice-q
 """
 
-from typing import Any
+import logging
+
 from temporalio import activity
 
+from shared.extraction import mock_extract_page
+from shared.payloads import ExtractPageInput, ExtractPageOutput
+
+logger = logging.getLogger(__name__)
+
 
 @activity.defn
-async def extract_invoice_activity(payload: dict[str, Any]) -> dict[str, Any]:
+async def extract_invoice_activity(payload: ExtractPageInput) -> ExtractPageOutput:
     """
     Extract invoice data from a page image (mock LLM).
     
@@ -28,30 +34,14 @@ async def extract_invoice_activity(payload: dict[str, Any]) -> dict[str, Any]:
         - date: str | None
         - error: str | None
     """
-    invoice_id = payload.get("invoice_id")
-    page_number = payload.get("page_number")
-    image_path = payload.get("image_path")
-    
     # Mock LLM extraction
-    mock_data = {
-        1: {"vendor": "ACME Corp", "amount": 1500.50, "date": "2024-12-01"},
-        2: {"vendor": "ACME Corp", "amount": 0.00, "date": "2024-12-01"},
-        3: {"vendor": "ACME Corp", "amount": 0.00, "date": "2024-12-01"},
-    }
-    
-    extracted = mock_data.get(page_number, {})
+    result = mock_extract_page(payload.invoice_id, payload.page_number)
     
-    print(
-        f"[EXTRACT_INVOICE] Page {page_number} → "
-        f"Vendor: {extracted.get('vendor')}, Amount: {extracted.get('amount')}"
+    logger.debug(
+        "[EXTRACT_INVOICE] Page %s → Vendor: %s, Amount: %s",
+        result.page_number,
+        result.vendor,
+        result.amount,
     )
     
-    return {
-        "invoice_id": invoice_id,
-        "page_number": page_number,
-        "success": True,
-        "vendor": extracted.get("vendor"),
-        "amount": extracted.get("amount"),
-        "date": extracted.get("date"),
-        "error": None,
-    }
+    return result
@@ -16,15 +16,17 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+import msgspec
 from temporalio.client import Client
-from temporalio.contrib.pydantic import pydantic_data_converter
 
-from invoice_workflow import FinalInvoice, InvoiceInput
 from shared.config import (
     TASK_QUEUE_ORCHESTRATION,
     TEMPORAL_ADDRESS_DOCKER,
     TEMPORAL_ADDRESS_LOCAL,
 )
+from shared.converter import msgspec_data_converter
+from shared.payloads import FinalInvoice, InvoiceInput
+from shared.runtime import install_uvloop
 
 logging.basicConfig(
     level=logging.INFO,
@@ -53,7 +55,7 @@ async def main():
     try:
         client = await Client.connect(
             TEMPORAL_ADDRESS,
-            data_converter=pydantic_data_converter,
+            data_converter=msgspec_data_converter,
         )
         logger.info("Connected to Temporal")
     except Exception as e:
@@ -78,6 +80,7 @@ async def main():
             invoice_input,
             id=WORKFLOW_ID,
             task_queue=TASK_QUEUE_ORCHESTRATION,
+            result_type=FinalInvoice,
         )
         logger.info(f"Workflow started with ID: {handle.id}")
     except Exception as e:
@@ -89,8 +92,7 @@ async def main():
     start_time = datetime.now()
 
     try:
-        result = await handle.result()
-        final_invoice = FinalInvoice.model_validate(result)
+        final_invoice = await handle.result()
 
         elapsed = (datetime.now() - start_time).total_seconds()
         logger.info("Workflow completed!")
@@ -100,7 +102,7 @@ async def main():
         logger.info("=" * 70)
         logger.info("WORKFLOW RESULT")
         logger.info("=" * 70)
-        logger.info(json.dumps(final_invoice.model_dump(), indent=2))
+        logger.info(json.dumps(msgspec.to_builtins(final_invoice), indent=2))
         logger.info("=" * 70)
 
     except Exception as e:
@@ -109,4 +111,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
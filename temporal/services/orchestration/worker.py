@@ -11,17 +11,21 @@ Usage:
 import asyncio
 import logging
 import os
-from temporalio.client import Client
-from temporalio.contrib.pydantic import pydantic_data_converter
 from temporalio.worker import Worker
 
 from invoice_workflow import InvoiceProcessingWorkflow
+from shared.client import get_temporal_client
 from shared.config import (
+    MAX_CONCURRENT_WORKFLOW_TASKS,
     TASK_QUEUE_ORCHESTRATION,
     TEMPORAL_ADDRESS_LOCAL,
 )
+from shared.runtime import install_uvloop
 
 TEMPORAL_ADDRESS = os.environ.get("TEMPORAL_ADDRESS", TEMPORAL_ADDRESS_LOCAL)
+MAX_WORKFLOW_TASKS = int(
+    os.environ.get("MAX_CONCURRENT_WORKFLOW_TASKS", MAX_CONCURRENT_WORKFLOW_TASKS)
+)
 
 # Configure logging
 logging.basicConfig(
@@ -36,10 +40,7 @@ async def main():
     """Start Orchestration worker."""
     logger.info(f"Connecting to Temporal server at {TEMPORAL_ADDRESS}...")
 
-    client = await Client.connect(
-        TEMPORAL_ADDRESS,
-        data_converter=pydantic_data_converter,
-    )
+    client = await get_temporal_client(TEMPORAL_ADDRESS)
 
     logger.info(f"Starting Orchestration worker on task queue: {TASK_QUEUE_ORCHESTRATION}")
     logger.info("Registered workflows: InvoiceProcessingWorkflow")
@@ -51,6 +52,7 @@ async def main():
         client,
         task_queue=TASK_QUEUE_ORCHESTRATION,
         workflows=[InvoiceProcessingWorkflow],
+        max_concurrent_workflow_tasks=MAX_WORKFLOW_TASKS,
         # NO activities—orchestration only dispatches to other services
     )
 
@@ -59,4 +61,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
@@ -0,0 +1,29 @@
+"""
+Process-wide Temporal client.
+
+Every worker in a process (see combined_worker.py) gets the same connected
+Client, so the gRPC channel and server handshake happen once per process.
+"""
+
+import asyncio
+
+from temporalio.client import Client
+
+from shared.config import TEMPORAL_ADDRESS_LOCAL
+from shared.converter import msgspec_data_converter
+
+_client: Client | None = None
+_client_lock = asyncio.Lock()
+
+
+async def get_temporal_client(address: str = TEMPORAL_ADDRESS_LOCAL) -> Client:
+    """Connect on first use and return the same client afterwards."""
+    global _client
+    if _client is None:
+        async with _client_lock:
+            if _client is None:
+                _client = await Client.connect(
+                    address,
+                    data_converter=msgspec_data_converter,
+                )
+    return _client
@@ -2,6 +2,8 @@
 Shared configuration for all Temporal services.
 """
 
+import os
+
 # Task Queue Names
 TASK_QUEUE_ORCHESTRATION = "orchestration-q"
 TASK_QUEUE_UPLOAD_PDF = "upload-pdf-q"
@@ -13,6 +15,20 @@ TASK_QUEUE_AGGREGATE_INVOICE = "aggregate-invoice-q"
 ACTIVITY_TIMEOUT = 30
 ACTIVITY_RETRY_MAX_ATTEMPTS = 3
 
+# Worker slot limits (the SDK default is 100 of each). Activities here are
+# async and I/O-bound, so the activity limit is the number of in-flight calls
+# per worker, not threads; override with MAX_CONCURRENT_ACTIVITIES /
+# MAX_CONCURRENT_WORKFLOW_TASKS
+MAX_CONCURRENT_ACTIVITIES = 100
+MAX_CONCURRENT_WORKFLOW_TASKS = 100
+
+# Invoices with at most this many pages are extracted and aggregated in a
+# single activity instead of fanning out one extract activity per page.
+# Opt-in (default 0, i.e. always fan out); set FUSED_EXTRACT_MAX_PAGES on the
+# orchestration worker, and only change it with no workflows in flight, since
+# replay takes the branch this value selects
+FUSED_EXTRACT_MAX_PAGES = int(os.environ.get("FUSED_EXTRACT_MAX_PAGES", "0"))
+
 # Temporal Server Addresses
 TEMPORAL_ADDRESS_DOCKER = "temporal:7233"
 TEMPORAL_ADDRESS_LOCAL = "localhost:7233"
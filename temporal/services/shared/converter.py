@@ -0,0 +1,54 @@
+"""
+msgspec-backed Temporal data converter.
+
+Mirrors temporalio.contrib.pydantic: the default JSON payload converter is
+swapped for one that encodes with msgspec and decodes straight into the
+activity/workflow type hints (e.g. the Structs in shared.payloads).
+"""
+
+from typing import Any
+
+import msgspec
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import (
+    CompositePayloadConverter,
+    DataConverter,
+    DefaultPayloadConverter,
+    EncodingPayloadConverter,
+    JSONPlainPayloadConverter,
+)
+
+_ENCODER = msgspec.json.Encoder()
+
+
+class MsgspecJSONPayloadConverter(EncodingPayloadConverter):
+    """JSON payload converter using msgspec for encoding and typed decoding."""
+
+    @property
+    def encoding(self) -> str:
+        return "json/plain"
+
+    def to_payload(self, value: Any) -> Payload | None:
+        return Payload(
+            metadata={"encoding": self.encoding.encode()},
+            data=_ENCODER.encode(value),
+        )
+
+    def from_payload(self, payload: Payload, type_hint: type | None = None) -> Any:
+        return msgspec.json.decode(payload.data, type=type_hint or Any)
+
+
+class MsgspecPayloadConverter(CompositePayloadConverter):
+    """Default payload converters with JSON handled by msgspec."""
+
+    def __init__(self) -> None:
+        json_payload_converter = MsgspecJSONPayloadConverter()
+        super().__init__(
+            *(
+                json_payload_converter if isinstance(c, JSONPlainPayloadConverter) else c
+                for c in DefaultPayloadConverter.default_encoding_payload_converters
+            )
+        )
+
+
+msgspec_data_converter = DataConverter(payload_converter_class=MsgspecPayloadConverter)
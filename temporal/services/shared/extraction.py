@@ -0,0 +1,29 @@
+"""
+Mock LLM extraction shared by the extract and aggregate services.
+
+The per-page extract activity and the fused extract + aggregate activity both
+call mock_extract_page, so the two paths can't drift apart.
+"""
+
+from shared.payloads import ExtractPageOutput
+
+# Mock LLM extraction results by page number
+MOCK_EXTRACTION = {
+    1: {"vendor": "ACME Corp", "amount": 1500.50, "date": "2024-12-01"},
+    2: {"vendor": "ACME Corp", "amount": 0.00, "date": "2024-12-01"},
+    3: {"vendor": "ACME Corp", "amount": 0.00, "date": "2024-12-01"},
+}
+
+
+def mock_extract_page(invoice_id: str, page_number: int) -> ExtractPageOutput:
+    """Extract one page (mock LLM)."""
+    extracted = MOCK_EXTRACTION.get(page_number, {})
+    return ExtractPageOutput(
+        invoice_id=invoice_id,
+        page_number=page_number,
+        success=True,
+        vendor=extracted.get("vendor"),
+        amount=extracted.get("amount"),
+        date=extracted.get("date"),
+        error=None,
+    )
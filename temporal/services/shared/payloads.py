@@ -0,0 +1,98 @@
+"""
+Payload types exchanged between the orchestration workflow and service activities.
+
+These are msgspec Structs so they (de)serialize through msgspec_data_converter
+without per-field Pydantic validation on every activity hop.
+"""
+
+import msgspec
+
+
+class InvoiceInput(msgspec.Struct):
+    """Workflow input for invoice processing."""
+
+    invoice_id: str
+    pdf_filename: str
+    pdf_bytes: bytes
+
+
+class UploadPdfInput(msgspec.Struct):
+    """Input for upload service."""
+
+    invoice_id: str
+    pdf_bytes: bytes
+
+
+class UploadPdfOutput(msgspec.Struct):
+    """Output from upload service."""
+
+    invoice_id: str
+    blob_path: str
+    file_size: int
+
+
+class SplitPdfInput(msgspec.Struct):
+    """Input for split service."""
+
+    invoice_id: str
+    blob_path: str
+
+
+class SplitPdfOutput(msgspec.Struct):
+    """Output from split service."""
+
+    invoice_id: str
+    page_count: int
+    page_paths: list[str]
+
+
+class ExtractPageInput(msgspec.Struct):
+    """Input for extract activity (per page)."""
+
+    invoice_id: str
+    page_number: int
+    image_path: str
+
+
+class ExtractPageOutput(msgspec.Struct):
+    """Output from extract activity (per page)."""
+
+    invoice_id: str
+    page_number: int
+    success: bool
+    vendor: str | None = None
+    amount: float | None = None
+    date: str | None = None
+    error: str | None = None
+
+
+class AggregateInput(msgspec.Struct, omit_defaults=True):
+    """Input for aggregate service: page results already folded into running totals."""
+
+    invoice_id: str
+    page_count: int = 0
+    successful_pages: int = 0
+    total_amount: float = 0.0
+    vendor: str | None = None
+    invoice_date: str | None = None
+    # Unfolded page results, only sent by workers from before the fold;
+    # kept so an aggregate activity they scheduled still decodes on retry
+    page_results: list[ExtractPageOutput] | None = None
+
+
+class ExtractAggregateInput(msgspec.Struct):
+    """Input for the fused extract + aggregate activity (small invoices)."""
+
+    invoice_id: str
+    page_paths: list[str]
+
+
+class FinalInvoice(msgspec.Struct):
+    """Final aggregated invoice result."""
+
+    invoice_id: str
+    confidence_score: float
+    page_count: int
+    vendor: str | None = None
+    total_amount: float | None = None
+    invoice_date: str | None = None
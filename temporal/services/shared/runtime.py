@@ -0,0 +1,18 @@
+"""
+Event loop setup shared by the worker and starter entry points.
+"""
+
+import asyncio
+
+
+def install_uvloop() -> None:
+    """Use uvloop's event loop policy when it is installed.
+
+    uvloop is POSIX-only (not a dependency on Windows), so this falls back to
+    the default event loop when it can't be imported.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
@@ -5,15 +5,24 @@ Activity: split_pdf_activity
 Task Queue: split-pdf-q
 """
 
-from typing import Any
+import logging
+from collections import OrderedDict
+
 from temporalio import activity
 
-# Mock blob storage (shared across services for POC)
-MOCK_BLOB_STORAGE = {}
+from shared.payloads import SplitPdfInput, SplitPdfOutput
+
+logger = logging.getLogger(__name__)
+
+# Mock blob storage (shared across services for POC), bounded so a
+# long-running worker doesn't grow forever
+MOCK_BLOB_STORAGE: OrderedDict[str, bytes] = OrderedDict()
+MOCK_BLOB_STORAGE_MAX_ENTRIES = 1024
+MOCK_IMAGE_DATA = b"mock_image_data"
 
 
 @activity.defn
-async def split_pdf_activity(payload: dict[str, Any]) -> dict[str, Any]:
+async def split_pdf_activity(payload: SplitPdfInput) -> SplitPdfOutput:
     """
     Split PDF into individual page images.
     
@@ -26,8 +35,8 @@ async def split_pdf_activity(payload: dict[str, Any]) -> dict[str, Any]:
         - page_count: int
         - page_paths: list[str] (paths to page images)
     """
-    invoice_id = payload.get("invoice_id")
-    blob_path = payload.get("blob_path")
+    invoice_id = payload.invoice_id
+    blob_path = payload.blob_path
     
     # Mock: simulate splitting into 3 pages
     page_count = 3
@@ -39,12 +48,14 @@ async def split_pdf_activity(payload: dict[str, Any]) -> dict[str, Any]:
     
     # Mock: store pages
     for page_path in page_paths:
-        MOCK_BLOB_STORAGE[page_path] = b"mock_image_data"
+        MOCK_BLOB_STORAGE[page_path] = MOCK_IMAGE_DATA
+    while len(MOCK_BLOB_STORAGE) > MOCK_BLOB_STORAGE_MAX_ENTRIES:
+        MOCK_BLOB_STORAGE.popitem(last=False)
     
-    print(f"[SPLIT_PDF] Split {blob_path} into {page_count} pages")
+    logger.debug("[SPLIT_PDF] Split %s into %s pages", blob_path, page_count)
     
-    return {
-        "invoice_id": invoice_id,
-        "page_count": page_count,
-        "page_paths": page_paths,
-    }
+    return SplitPdfOutput(
+        invoice_id=invoice_id,
+        page_count=page_count,
+        page_paths=page_paths,
+    )
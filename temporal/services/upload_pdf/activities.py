@@ -5,40 +5,49 @@ Activity: upload_pdf_activity
 Task Queue: upload-pdf-q
 """
 
-from typing import Any
+import logging
+from collections import OrderedDict
+
 from temporalio import activity
 
-# Mock blob storage for POC
-MOCK_BLOB_STORAGE = {}
+from shared.payloads import UploadPdfInput, UploadPdfOutput
+
+logger = logging.getLogger(__name__)
+
+# Mock blob storage for POC, bounded so a long-running worker doesn't grow forever
+MOCK_BLOB_STORAGE: OrderedDict[str, bytes] = OrderedDict()
+MOCK_BLOB_STORAGE_MAX_ENTRIES = 1024
 
 
 @activity.defn
-async def upload_pdf_activity(payload: dict[str, Any]) -> dict[str, Any]:
+async def upload_pdf_activity(payload: UploadPdfInput) -> UploadPdfOutput:
     """
     Upload PDF bytes to blob storage.
     
     Input:
         - invoice_id: str
-        - pdf_bytes: bytes (base64 encoded)
+        - pdf_bytes: bytes (base64 encoded on the wire)
     
     Returns:
         - invoice_id: str
         - blob_path: str
         - file_size: int
     """
-    invoice_id = payload.get("invoice_id")
-    pdf_bytes = payload.get("pdf_bytes", "")
+    invoice_id = payload.invoice_id
+    pdf_bytes = payload.pdf_bytes
     
     # Mock: store in memory
     blob_path = f"pdfs/{invoice_id}.pdf"
-    file_size = len(pdf_bytes) if isinstance(pdf_bytes, bytes) else len(pdf_bytes.encode())
+    file_size = len(pdf_bytes)
     
     MOCK_BLOB_STORAGE[blob_path] = pdf_bytes
+    if len(MOCK_BLOB_STORAGE) > MOCK_BLOB_STORAGE_MAX_ENTRIES:
+        MOCK_BLOB_STORAGE.popitem(last=False)
     
-    print(f"[UPLOAD_PDF] Uploaded {blob_path} ({file_size} bytes)")
+    logger.debug("[UPLOAD_PDF] Uploaded %s (%s bytes)", blob_path, file_size)
     
-    return {
-        "invoice_id": invoice_id,
-        "blob_path": blob_path,
-        "file_size": file_size,
-    }
+    return UploadPdfOutput(
+        invoice_id=invoice_id,
+        blob_path=blob_path,
+        file_size=file_size,
+    )
@@ -11,14 +11,19 @@ import asyncio
 import logging
 import os
 
-from temporalio.client import Client
-from temporalio.contrib.pydantic import pydantic_data_converter
 from temporalio.worker import Worker
 
 from activities import upload_pdf_activity
-from shared.config import TASK_QUEUE_UPLOAD_PDF, TEMPORAL_ADDRESS_LOCAL
+from shared.client import get_temporal_client
+from shared.config import (
+    MAX_CONCURRENT_ACTIVITIES,
+    TASK_QUEUE_UPLOAD_PDF,
+    TEMPORAL_ADDRESS_LOCAL,
+)
+from shared.runtime import install_uvloop
 
 TEMPORAL_ADDRESS = os.environ.get("TEMPORAL_ADDRESS", TEMPORAL_ADDRESS_LOCAL)
+MAX_ACTIVITIES = int(os.environ.get("MAX_CONCURRENT_ACTIVITIES", MAX_CONCURRENT_ACTIVITIES))
 
 # Configure logging
 logging.basicConfig(
@@ -33,10 +38,7 @@ async def main():
     """Start Upload PDF worker."""
     logger.info(f"Connecting to Temporal server at {TEMPORAL_ADDRESS}...")
 
-    client = await Client.connect(
-        TEMPORAL_ADDRESS,
-        data_converter=pydantic_data_converter,
-    )
+    client = await get_temporal_client(TEMPORAL_ADDRESS)
 
     logger.info(f"Starting Upload PDF worker on task queue: {TASK_QUEUE_UPLOAD_PDF}")
     logger.info("Registered activities: upload_pdf_activity")
@@ -45,6 +47,7 @@ async def main():
         client,
         task_queue=TASK_QUEUE_UPLOAD_PDF,
         activities=[upload_pdf_activity],
+        max_concurrent_activities=MAX_ACTIVITIES,
     )
 
     logger.info("Upload PDF worker started. Press Ctrl+C to stop.")
@@ -52,4 +55,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())